@@ -1,11 +1,26 @@
 # chatbot_backend/app.py
 # pyright: reportCallIssue=false
 
-from flask import Flask, request, jsonify, send_from_directory
+import time
+
+BOOT_STARTED = time.perf_counter()  # reference point for startup_report
+
+from flask import (
+    Flask,
+    Response,
+    request,
+    jsonify,
+    send_from_directory,
+    stream_with_context,
+)
 from flask_cors import CORS
+import importlib
 import os
+import json
 import logging
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime, timedelta
 
 # ==== AUTH / DB IMPORTS ====
@@ -20,7 +35,6 @@ from flask_jwt_extended import (
 )
 from werkzeug.utils import secure_filename
 from flask_socketio import SocketIO, emit, join_room
-from sqlalchemy import func
 
 from models import (
     db,
@@ -30,8 +44,33 @@ from models import (
     ChatMessage,
     AiConversation,
     AiMessage,
+    DailyHistory,
+    day_bounds,
+    rebuild_daily_history,
+    sync_conversation_stats,
 )
-from test import Assistant  # type: ignore
+import db_config
+import migrations
+from caches import SemanticAnswerCache, SingleFlight, normalize_query
+from chunking import estimate_tokens
+from context_builder import ContextAssembler
+from llm_client import CircuitOpenError
+from metrics import LatencyRecorder
+from pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    PageRequest,
+    keyset_page,
+    newer_than,
+)
+from summaries import BackgroundSummarizer
+
+# The Assistant (test.py -> sentence_transformers, torch) is imported by
+# ensure_chatbot(), not here, so /api/health is up before the ML stack is.
+startup_report = {
+    "appImportMs": round((time.perf_counter() - BOOT_STARTED) * 1000, 1),
+    "firstHealthyResponseMs": None,
+}
 
 # -------------------------------------------------
 # APP + CORS + SOCKET.IO
@@ -59,14 +98,48 @@ os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
 # -------------------------------------------------
 # DB & JWT CONFIG
 # -------------------------------------------------
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///users.db"
+# SQLite (tuned, see db_config.py) unless DATABASE_URL points at Postgres
+db_config.configure(app)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["JWT_SECRET_KEY"] = "change-this-secret-key"
 
 # Access tokens last 8 hours (session-like)
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=8)
 
+# Semantic answer cache for anonymous /api/chat questions
+app.config["ANSWER_CACHE_SIMILARITY"] = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+app.config["ANSWER_CACHE_TTL"] = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+app.config["ANSWER_CACHE_SIZE"] = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+
+# Prompt context budget (estimated tokens) and how many KB chunks to offer it
+app.config["CONTEXT_TOKEN_BUDGET"] = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+app.config["CONTEXT_KB_CHUNKS"] = int(os.getenv("CONTEXT_KB_CHUNKS", "4"))
+
+# /api/chat/batch: max questions per call and parallel LLM calls (all batches)
+app.config["CHAT_BATCH_MAX_QUESTIONS"] = int(os.getenv("CHAT_BATCH_MAX_QUESTIONS", "25"))
+app.config["CHAT_BATCH_CONCURRENCY"] = int(os.getenv("CHAT_BATCH_CONCURRENCY", "4"))
+
+# Load the Assistant in a background thread at boot instead of on the first
+# chat request; a failed warmup is retried after WARMUP_RETRY_SECONDS
+app.config["CHATBOT_WARMUP"] = os.getenv("CHATBOT_WARMUP", "1") != "0"
+app.config["WARMUP_RETRY_SECONDS"] = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+
+# Rolling per-conversation summary (words) sent instead of the raw history.
+# Messages that left the recent-turn window are folded in once at least
+# SUMMARY_MIN_MESSAGES have piled up (until then they are sent verbatim),
+# at most SUMMARY_WINDOW_TOKENS (estimated) of them per LLM call.
+app.config["SUMMARY_MAX_WORDS"] = int(os.getenv("SUMMARY_MAX_WORDS", "120"))
+app.config["SUMMARY_MIN_MESSAGES"] = int(os.getenv("SUMMARY_MIN_MESSAGES", "6"))
+app.config["SUMMARY_WINDOW_TOKENS"] = int(os.getenv("SUMMARY_WINDOW_TOKENS", "1500"))
+
+# Keyset pagination of message/history/user lists: ?limit= is clamped to
+# PAGE_SIZE_MAX, and requests without one get PAGE_SIZE_DEFAULT rows
+app.config["PAGE_SIZE_DEFAULT"] = int(os.getenv("PAGE_SIZE_DEFAULT", str(DEFAULT_PAGE_SIZE)))
+app.config["PAGE_SIZE_MAX"] = int(os.getenv("PAGE_SIZE_MAX", str(MAX_PAGE_SIZE)))
+
 db.init_app(app)
+with app.app_context():
+    db_config.apply_sqlite_pragmas(db.engine)
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
 
@@ -133,16 +206,61 @@ logging.basicConfig(
 )
 
 # -------------------------------------------------
-# CHATBOT INIT  (LAZY TO AVOID RENDER TIMEOUT)
+# CHATBOT INIT  (BACKGROUND WARMUP, BOOT STAYS FAST)
 # -------------------------------------------------
 chatbot = None
 uni_data = None
 
+# Answers for anonymous users, keyed by question embedding. Logged-in users
+# get personalized prompts (profile + history), so they always bypass it.
+answer_cache = SemanticAnswerCache(
+    threshold=app.config["ANSWER_CACHE_SIMILARITY"],
+    ttl=app.config["ANSWER_CACHE_TTL"],
+    maxsize=app.config["ANSWER_CACHE_SIZE"],
+)
+
+# Identical anonymous questions asked at the same moment (e.g. right after
+# an announcement) share one embedding + retrieval + LLM call.
+inflight_answers = SingleFlight()
+
+# LLM calls of /api/chat/batch; shared so concurrent batches stay bounded too
+batch_executor = ThreadPoolExecutor(
+    max_workers=app.config["CHAT_BATCH_CONCURRENCY"], thread_name_prefix="chat-batch"
+)
+
+# time-to-first-token of streamed answers (SSE + Socket.IO)
+ttft_stats = LatencyRecorder()
+
+
+# ensure_chatbot() builds the Assistant exactly once, whoever calls it first
+chatbot_lock = threading.Lock()
+
+# what /api/ready reports while (and after) the Assistant loads
+warmup_state = {
+    "stage": "idle",
+    "startedAt": None,
+    "readyAt": None,
+    "failedAt": None,
+    "error": None,
+    "attempts": 0,
+    "timings": {},
+}
+
+
+def run_warmup_stage(name, fn):
+    """Run one warmup step, recording it as the current stage and its time (ms)."""
+    warmup_state["stage"] = name
+    started = time.perf_counter()
+    result = fn()
+    warmup_state["timings"][name] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
 
 def ensure_chatbot():
     """
-    Lazily initialize the Assistant on first use instead of at import time.
-    This keeps Render startup fast and avoids deployment timeouts.
+    Initialize the Assistant once. Normally the background warmup started
+    at boot gets here first; a request arriving during warmup waits on the
+    lock instead of building a second Assistant.
     """
     global chatbot, uni_data
 
@@ -150,34 +268,75 @@ def ensure_chatbot():
     if chatbot is not None:
         return
 
-    try:
-        # Heavy stuff happens here, but only on first /api/chat call
-        local_bot = Assistant()
+    with chatbot_lock:
+        if chatbot is not None:
+            return
+
+        warmup_state.update(
+            stage="starting",
+            startedAt=datetime.utcnow().isoformat(),
+            error=None,
+            timings={},
+        )
+        warmup_state["attempts"] += 1
+        started = time.perf_counter()
 
-        local_uni_data = None
         try:
-            local_uni_data = local_bot.load_file("university_data.txt")
-            print("Data file 'university_data.txt' loaded successfully")
+            # the heavy ML imports happen here, on first use
+            Assistant = run_warmup_stage(
+                "import_assistant", lambda: importlib.import_module("test").Assistant
+            )
+            # embedding model + knowledge-base index
+            local_bot = run_warmup_stage("assistant", Assistant)
+            warmup_state["timings"].update(local_bot.startup_timings)
+
+            local_uni_data = None
+            try:
+                local_uni_data = run_warmup_stage(
+                    "data_file", lambda: local_bot.load_file("university_data.txt")
+                )
+                print("Data file 'university_data.txt' loaded successfully")
+            except Exception as e:  # noqa: BLE001
+                logging.error(f"Data loading error: {str(e)}")
+                print(f"Error loading data file: {str(e)}")
+
+            # one throwaway search so the first real question is not the
+            # one paying for lazy allocations inside the encoder
+            run_warmup_stage("warm_query", lambda: local_bot.retrieve("semester fee", top_k=1))
+
+            # pick up edits to the knowledge sources without a restart
+            run_warmup_stage("watcher", local_bot.start_watcher)
+
+            # Only assign to globals if everything above worked
+            chatbot = local_bot
+            uni_data = local_uni_data
+            warmup_state["timings"]["totalMs"] = round((time.perf_counter() - started) * 1000, 1)
+            warmup_state.update(stage="ready", readyAt=datetime.utcnow().isoformat())
+
         except Exception as e:  # noqa: BLE001
-            logging.error(f"Data loading error: {str(e)}")
-            print(f"Error loading data file: {str(e)}")
+            logging.error(f"Failed to initialize Assistant: {str(e)}")
+            chatbot = None
+            uni_data = None
+            warmup_state.update(
+                stage="failed", failedAt=time.time(), error=str(e)
+            )
+            print("❌ Failed to initialize Assistant – see logs.")
 
-        # Only assign to globals if everything above worked
-        chatbot = local_bot
-        uni_data = local_uni_data
 
-    except Exception as e:  # noqa: BLE001
-        logging.error(f"Failed to initialize Assistant: {str(e)}")
-        chatbot = None
-        uni_data = None
-        print("❌ Failed to initialize Assistant – see logs.")
+def start_warmup():
+    """Run ensure_chatbot() in a daemon thread so no user waits for it."""
+    thread = threading.Thread(target=ensure_chatbot, name="chatbot-warmup", daemon=True)
+    thread.start()
+    return thread
 
 
 # -------------------------------------------------
-# CREATE TABLES + DEFAULT ADMIN
+# MIGRATE SCHEMA + DEFAULT ADMIN
 # -------------------------------------------------
 with app.app_context():
-    db.create_all()
+    # schema changes live in migrations.py; this applies the pending ones
+    for applied in migrations.upgrade():
+        print(f"Applied migration {applied}")
 
     admin_email = "admin@pafiast.com"
     existing_admin = User.query.filter_by(email=admin_email).first()
@@ -195,6 +354,9 @@ with app.app_context():
     else:
         print("✅ Admin already exists")
 
+if app.config["CHATBOT_WARMUP"]:
+    start_warmup()
+
 
 # -------------------------------------------------
 # SIMPLE HEALTH CHECK FOR FRONTEND BANNER
@@ -202,49 +364,248 @@ with app.app_context():
 @app.route("/api/health", methods=["GET"])
 def health():
     """Used by the React app to know if the API is alive."""
+    if startup_report["firstHealthyResponseMs"] is None:
+        startup_report["firstHealthyResponseMs"] = round(
+            (time.perf_counter() - BOOT_STARTED) * 1000, 1
+        )
     return jsonify({"status": "ok"}), 200
 
 
-# -------------------------------------------------
-# HELPERS: USER-SPECIFIC CHAT CONTEXT + FILE HISTORY
-# -------------------------------------------------
-def build_user_history_context(user_id: int, max_pairs: int = 10) -> str:
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """
+    Readiness probe for the load balancer: 200 once the Assistant is
+    loaded, 503 (with the current warmup stage and timings) until then.
     """
-    Build a short textual history for this user from AiMessage DB,
-    to be used as extra context for the Assistant.
+    is_ready = chatbot is not None
+    if (
+        not is_ready
+        and warmup_state["stage"] == "failed"
+        and time.time() - warmup_state["failedAt"] >= app.config["WARMUP_RETRY_SECONDS"]
+        and not chatbot_lock.locked()
+    ):
+        warmup_state["stage"] = "retrying"
+        start_warmup()
+
+    body = dict(
+        warmup_state,
+        timings=dict(warmup_state["timings"]),
+        startup=startup_report,
+        ready=is_ready,
+    )
+    return jsonify(body), 200 if is_ready else 503
 
-    We fetch the last ~max_pairs user+ai messages and format them like:
 
-      User: ...
-      Assistant: ...
-    """
-    if not user_id:
-        return ""
+@app.route("/api/metrics", methods=["GET"])
+@require_roles("ADMIN", "SUB_ADMIN")
+def metrics():
+    """In-process cache counters for the chat path (admins only)."""
+    return jsonify(
+        {
+            "queryEmbeddingCache": chatbot.query_cache.stats() if chatbot else None,
+            "answerCache": answer_cache.stats(),
+            "coalescing": inflight_answers.stats(),
+            "llm": chatbot.llm.stats() if chatbot else None,
+            "conversationMemory": chatbot.memory.stats() if chatbot else None,
+            "embeddingBatcher": chatbot.embedder.stats()
+            if chatbot and hasattr(chatbot.embedder, "stats")
+            else None,
+            "summaries": dict(
+                summarizer.stats(), llm=chatbot.summary_llm.stats() if chatbot else None
+            ),
+            "database": db_config.describe(db.engine),
+            "streamingTtft": ttft_stats.stats(),
+            "retrieval": {
+                "mode": chatbot.retrieval_mode,
+                "embeddingBackend": chatbot.embedder.name,
+                "sources": chatbot.kb_stats(),
+                "mmr": {
+                    "enabled": chatbot.mmr,
+                    "lambda": chatbot.mmr_lambda,
+                    "candidates": chatbot.mmr_candidates,
+                },
+                "lexicalFastPathHits": chatbot.lexical_fast_path_hits,
+            }
+            if chatbot
+            else None,
+        }
+    )
+
 
+# -------------------------------------------------
+# HELPERS: USER-SPECIFIC CHAT CONTEXT + FILE HISTORY
+# -------------------------------------------------
+def recent_turns(conversation_id: int, max_turns: int) -> list:
+    """Last `max_turns` (question, reply) pairs of a conversation, oldest first."""
     msgs = (
-        db.session.query(AiMessage)
-        .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
-        .filter(AiConversation.user_id == user_id)
+        AiMessage.query.filter_by(conversation_id=conversation_id)
         .order_by(AiMessage.created_at.desc(), AiMessage.id.desc())
-        .limit(max_pairs * 2)
+        .limit(max_turns * 2)
         .all()
     )
 
-    if not msgs:
-        return ""
+    turns = []
+    question = None
+    for m in reversed(msgs):
+        if m.sender == "user":
+            question = m.text
+        elif question is not None:
+            turns.append((question, m.text))
+            question = None
+    return turns
 
-    # Reverse → chronological order
-    msgs = list(reversed(msgs))
 
+def message_lines(messages, max_tokens=None) -> list:
+    """"User: ..." / "Assistant: ..." lines, each cut to `max_tokens` if given."""
     lines = []
-    for m in msgs:
-        role = "User" if m.sender == "user" else "Assistant"
+    for m in messages:
         text = (m.text or "").strip()
-        if len(text) > 400:
-            text = text[:400] + "…"
-        lines.append(f"{role}: {text}")
+        if max_tokens is not None and estimate_tokens(text) > max_tokens:
+            text = text[: max_tokens * 4] + " ..."
+        lines.append(f"{'User' if m.sender == 'user' else 'Assistant'}: {text}")
+    return lines
+
+
+def unsummarized_query(conversation):
+    """Messages of `conversation` that are not folded into its summary yet."""
+    query = AiMessage.query.filter(AiMessage.conversation_id == conversation.id)
+    if conversation.summary_upto_id:
+        query = query.filter(AiMessage.id > conversation.summary_upto_id)
+    return query
+
+
+def unsummarized_lines(conversation) -> list:
+    """
+    Lines for the messages that left the recent-turn window but are not in
+    the summary yet (fewer than SUMMARY_MIN_MESSAGES, unless the summarizer
+    lags behind). Call before adding this turn's message to the session.
+    """
+    keep = chatbot.memory.max_turns * 2
+    newest = (
+        unsummarized_query(conversation)
+        .order_by(AiMessage.id.desc())
+        .limit(keep + app.config["SUMMARY_MIN_MESSAGES"])
+        .all()
+    )
+    return message_lines(reversed(newest[keep:]), max_tokens=200)
+
+
+def summarize_conversation(conversation_id: int) -> None:
+    """
+    Background job: fold messages that are no longer among the recent turns
+    into AiConversation.summary. Runs outside any request.
+
+    Nothing happens until SUMMARY_MIN_MESSAGES messages are waiting. They
+    are folded in windows of at most SUMMARY_WINDOW_TOKENS, one LLM call
+    and one commit each, so a long conversation (first summary, rebuild
+    after a delete) never becomes one huge prompt. Each write only lands
+    if the summary is still the one it extends and none of the folded
+    messages was deleted meanwhile; otherwise the job stops and the pass
+    scheduled by the delete starts over.
+    """
+    with app.app_context():
+        conversation = AiConversation.query.get(conversation_id)
+        if conversation is None or chatbot is None:
+            return
+
+        # the newest turns travel verbatim (Assistant.memory), so keep them out
+        keep = chatbot.memory.max_turns * 2
+        pending = unsummarized_query(conversation)
+        last_to_fold = (
+            pending.with_entities(AiMessage.id)
+            .order_by(AiMessage.id.desc())
+            .offset(keep)
+            .limit(1)
+            .scalar()
+        )
+        if last_to_fold is None:
+            return
+        to_fold = pending.filter(AiMessage.id <= last_to_fold)
+        if to_fold.count() < app.config["SUMMARY_MIN_MESSAGES"]:
+            return
+
+        summary = conversation.summary
+        upto_id = conversation.summary_upto_id
+        folded = (
+            AiMessage.query.filter(
+                AiMessage.conversation_id == conversation_id, AiMessage.id <= upto_id
+            ).count()
+            if upto_id
+            else 0
+        )
+        budget = app.config["SUMMARY_WINDOW_TOKENS"]
+
+        while upto_id is None or upto_id < last_to_fold:
+            query = AiMessage.query.filter(
+                AiMessage.conversation_id == conversation_id, AiMessage.id <= last_to_fold
+            )
+            if upto_id:
+                query = query.filter(AiMessage.id > upto_id)
+            candidates = query.order_by(AiMessage.id.asc()).limit(100).all()
+            if not candidates:
+                return
+
+            lines = message_lines(candidates, max_tokens=budget)
+            window, used = 0, 0
+            for line in lines:
+                cost = estimate_tokens(line)
+                if window and used + cost > budget:
+                    break
+                window, used = window + 1, used + cost
+
+            summary = chatbot.summarize(
+                summary, lines[:window], max_words=app.config["SUMMARY_MAX_WORDS"]
+            )
+            new_upto = candidates[window - 1].id
+
+            # compare-and-set: same summary as we started from, and every
+            # message up to new_upto still there
+            still_there = (
+                db.select(db.func.count(AiMessage.id))
+                .where(AiMessage.conversation_id == conversation_id, AiMessage.id <= new_upto)
+                .scalar_subquery()
+            )
+            written = AiConversation.query.filter(
+                AiConversation.id == conversation_id,
+                AiConversation.summary_upto_id == upto_id
+                if upto_id
+                else AiConversation.summary_upto_id.is_(None),
+                still_there == folded + window,
+            ).update(
+                {
+                    "summary": summary,
+                    "summary_upto_id": new_upto,
+                    # bulk update so the sidebar order (updated_at) is left alone
+                    "updated_at": AiConversation.updated_at,
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if not written:
+                logging.warning(
+                    f"Summary for conversation {conversation_id} went stale, not saved"
+                )
+                return
+            upto_id, folded = new_upto, folded + window
+
+
+summarizer = BackgroundSummarizer(summarize_conversation)
 
-    return "\n".join(lines)
+
+def reset_conversation_summaries(conv_ids) -> None:
+    """After messages were deleted: rebuild summaries from what is left."""
+    for cid in conv_ids:
+        updated = AiConversation.query.filter_by(id=cid).update(
+            {
+                "summary": None,
+                "summary_upto_id": None,
+                "updated_at": AiConversation.updated_at,
+            },
+            synchronize_session=False,
+        )
+        if updated:
+            db.session.commit()
+            summarizer.schedule(cid)
 
 
 def append_user_history_file(user_id: int, user_text: str, ai_text: str) -> None:
@@ -267,6 +628,260 @@ def append_user_history_file(user_id: int, user_text: str, ai_text: str) -> None
         logging.warning(f"Failed to append user history file: {exc}")
 
 
+def chat_reply_payload(response: str, conversation=None, context_report=None):
+    """JSON body returned by /api/chat (several keys for older frontends)."""
+    payload = {
+        "response": response,
+        "answer": response,
+        "reply": response,
+        "message": response,
+        "text": response,
+        "conversationId": conversation.id if conversation else None,
+    }
+    if context_report is not None:
+        # per-section token counts of the prompt context that was sent
+        payload["contextTokens"] = context_report
+    return jsonify(payload)
+
+
+# Strong system-level context to avoid "Haseeb" issue
+SYSTEM_CONTEXT = "\n".join(
+    [
+        "You are the official Ask-PAFIAST AI assistant.",
+        "Use ONLY these sources when answering:",
+        "  1) University knowledge from PAF-IAST (provided below).",
+        "  2) The current user's profile and role from the database (if given).",
+        "  3) The previous conversation history shown below, which belongs ONLY to this logged-in user.",
+        "",
+        "Important:",
+        "  - If any older notes or texts claim the user's name is 'Haseeb', IGNORE them completely.",
+        "  - Never assume the user is 'Haseeb' unless it is explicitly stated in the current user profile.",
+        "  - Prefer the user's profile (name, role, department, semester) from the DB over any other source.",
+    ]
+)
+
+
+def prepare_chat_turn(
+    user_message: str, user_id=None, conversation_id=None, kb_chunks=None, kb=None
+):
+    """
+    Everything that happens before the LLM call, shared by /api/chat,
+    /api/chat/stream and the "ask_bot" Socket.IO event.
+
+    For logged-in users this finds/creates the AiConversation and adds the
+    user AiMessage to the session (not committed). Returns
+    (conversation, full_context, context_report). `kb_chunks` skips the
+    retrieval step when the caller already searched (batch endpoint); `kb`
+    is the knowledge-base snapshot to search (default: the current one).
+
+    Context sources:
+      1) University data (university_data.txt) via semantic search.
+      2) The app's own DB – current user's profile (name, role, dept, semester).
+      3) This conversation's rolling summary (AiConversation.summary) and
+         the few older messages not folded into it yet; its last turns are
+         sent as chat messages by the Assistant.
+    """
+    # Current user object from DB (if logged in)
+    current_user = User.query.get(user_id) if user_id else None
+
+    conversation = None
+    pending_lines = []
+
+    # ---------- For logged-in users: prepare conversation + save user message ----------
+    if user_id:
+        if conversation_id:
+            conversation = (
+                AiConversation.query.filter_by(
+                    id=conversation_id, user_id=user_id
+                ).first()
+            )
+
+        if conversation is not None and conversation.id not in chatbot.memory:
+            # cold memory (restart / eviction): reload the newest turns from DB
+            chatbot.memory.seed(
+                conversation.id, recent_turns(conversation.id, chatbot.memory.max_turns)
+            )
+
+        if conversation is not None:
+            # before the add below, so no autoflush takes the write lock here
+            pending_lines = unsummarized_lines(conversation)
+
+        if conversation is None:
+            # Create new conversation; first user message is used as title
+            conversation = AiConversation(
+                user_id=user_id,
+                title=user_message[:80],
+            )
+            db.session.add(conversation)
+            db.session.flush()  # so conversation.id exists
+
+        # save user message (not committed yet)
+        db.session.add(
+            AiMessage(
+                conversation_id=conversation.id,
+                sender="user",
+                text=user_message,
+            )
+        )
+
+    # ---------- CONTEXT: SYSTEM INSTRUCTION + UNIVERSITY DATA + USER PROFILE + USER HISTORY ----------
+
+    # 1) System instruction: SYSTEM_CONTEXT above
+
+    # 2) University data knowledge, best chunk first
+    if kb_chunks is None:
+        try:
+            kb_chunks = chatbot.retrieve(
+                user_message, top_k=app.config["CONTEXT_KB_CHUNKS"], kb=kb
+            )
+        except Exception as exc:  # noqa: BLE001
+            logging.warning(f"semantic_search error: {exc}")
+            kb_chunks = []
+
+    # 3) User profile context from DB
+    user_profile_context = ""
+    if current_user:
+        parts = (current_user.full_name or "").split()
+        first_name = parts[0] if len(parts) > 0 else ""
+        last_name = " ".join(parts[1:]) if len(parts) > 1 else ""
+
+        user_profile_context_lines = [
+            "Current user profile from database:",
+            f"- Full name: {current_user.full_name or 'N/A'}",
+            f"- First name (preferred to use): {first_name or 'N/A'}",
+            f"- Last name: {last_name or 'N/A'}",
+            f"- Role: {current_user.role or 'N/A'}",
+            f"- Department: {current_user.department or 'N/A'}",
+            f"- Semester: {current_user.semester or 'N/A'}",
+            "",
+            "When you need the user's name, call them by their first name above.",
+        ]
+        user_profile_context = "\n".join(user_profile_context_lines)
+
+    # 4) Rolling summary of this conversation (+ messages it does not cover
+    #    yet); the last turns themselves are sent as chat messages from
+    #    Assistant.memory
+    summary = conversation.summary if conversation is not None else ""
+
+    # Compose final context within the token budget. Priority decides who
+    # gets budget first; lowest-ranked chunks and oldest history go first.
+    assembler = ContextAssembler(max_tokens=app.config["CONTEXT_TOKEN_BUDGET"])
+    assembler.add("system", SYSTEM_CONTEXT, priority=0, max_tokens=250)
+    assembler.add(
+        "knowledge",
+        [c["text"] for c in kb_chunks],
+        priority=1,
+        header="University knowledge:",
+        max_tokens=700,
+        drop="tail",
+        joiner="\n\n",
+    )
+    assembler.add("profile", user_profile_context, priority=2, max_tokens=150)
+    assembler.add(
+        "history",
+        summary or "",
+        priority=3,
+        header="Summary of the earlier conversation with this user:",
+        max_tokens=app.config["SUMMARY_MAX_WORDS"] * 2,
+    )
+    assembler.add(
+        "pending",
+        pending_lines,
+        priority=4,
+        header="Earlier messages not in the summary yet:",
+        drop="head",
+    )
+    full_context, context_report = assembler.build()
+
+    return conversation, full_context, context_report
+
+
+def finish_chat_turn(user_id, conversation, user_message: str, response: str) -> None:
+    """Save the AI reply to DB + per-user txt (logged-in users only)."""
+    if user_id and conversation:
+        db.session.add(
+            AiMessage(
+                conversation_id=conversation.id,
+                sender="ai",
+                text=response,
+            )
+        )
+        db.session.commit()
+
+        # also keep a per-user chat_history_<id>.txt file
+        append_user_history_file(user_id, user_message, response)
+
+        # fold older turns into the rolling summary, off the request path
+        summarizer.schedule(conversation.id)
+
+    # NOTE: We no longer call chatbot.save_conversation(...) here,
+    # to avoid polluting a global text file with old persona/name info.
+
+
+def cached_answer_for(user_id, user_message: str, kb):
+    """
+    Anonymous users only: returns (cached_answer_or_None, query_vec).
+    query_vec is None when the cache does not apply, so callers know not
+    to store the reply afterwards. `kb` is the knowledge-base snapshot the
+    caller retrieves from; answers are cached under its index_hash.
+    """
+    if user_id:
+        return None, None
+    try:
+        query_vec = chatbot.embed_queries([user_message])[0]
+        return answer_cache.lookup(query_vec, kb.index_hash), query_vec
+    except Exception as exc:  # noqa: BLE001
+        logging.warning(f"answer cache lookup error: {exc}")
+        return None, None
+
+
+def anonymous_answer(user_message: str, kb):
+    """
+    Full answer path for a signed-out user: semantic cache, retrieval and
+    LLM call, all on the knowledge-base snapshot `kb`, so a hot reload in
+    between cannot file an old answer under the new index_hash. Returns
+    (response, context_report); the report is None when the answer came
+    from the cache.
+    """
+    cached, query_vec = cached_answer_for(None, user_message, kb)
+    if cached is not None:
+        return cached, None
+
+    _, full_context, context_report = prepare_chat_turn(user_message, kb=kb)
+    response, ok = chatbot.answer(user_message, full_context)
+    if ok and query_vec is not None:
+        answer_cache.store(user_message, query_vec, response, kb.index_hash)
+    return response, context_report
+
+
+def page_request() -> PageRequest:
+    """limit/before/after of the current request, within the configured caps."""
+    return PageRequest.from_args(
+        request.args,
+        default=app.config["PAGE_SIZE_DEFAULT"],
+        maximum=app.config["PAGE_SIZE_MAX"],
+    )
+
+
+def forget_conversation_memory(conv_ids) -> None:
+    """Drop in-memory turns of conversations whose messages were deleted."""
+    if chatbot is None:
+        return
+    for cid in conv_ids:
+        chatbot.memory.forget(cid)
+
+
+def chatbot_unavailable():
+    return (
+        jsonify(
+            {
+                "error": "Chatbot failed to initialize on server. Please try again later."
+            }
+        ),
+        500,
+    )
+
+
 # -------------------------------------------------
 # CHATBOT ENDPOINT (AI BOT) + PER-USER HISTORY
 # -------------------------------------------------
@@ -279,8 +894,8 @@ def chat():
     Reply sources (as you requested):
       1) University data (university_data.txt) via semantic search.
       2) The app's own DB – current user's profile (name, role, dept, semester).
-      3) Per-user conversation history stored in AiConversation/AiMessage (and a
-         per-user chat_history_<user_id>.txt file).
+      3) The conversation's rolling summary + last turns, stored in
+         AiConversation/AiMessage (and a per-user chat_history_<user_id>.txt file).
 
     No other .txt persona files are used for context here.
     """
@@ -288,14 +903,7 @@ def chat():
         # 🔹 Make sure chatbot is initialized (lazy load)
         ensure_chatbot()
         if chatbot is None:
-            return (
-                jsonify(
-                    {
-                        "error": "Chatbot failed to initialize on server. Please try again later."
-                    }
-                ),
-                500,
-            )
+            return chatbot_unavailable()
 
         data = request.get_json(force=True) or {}
         if "message" not in data:
@@ -309,135 +917,236 @@ def chat():
         identity = get_jwt_identity()
         user_id = int(identity) if identity is not None else None
 
-        # Current user object from DB (if logged in)
-        current_user = User.query.get(user_id) if user_id else None
+        # ---------- Anonymous users: answer cache + in-flight coalescing ----------
+        if user_id is None:
+            # the prompt holds no personal data, so the answer only depends
+            # on the question and the knowledge-base version
+            kb = chatbot.kb
+            key = (normalize_query(user_message), kb.index_hash)
+            (response, context_report), _ = inflight_answers.do(
+                key, lambda: anonymous_answer(user_message, kb)
+            )
+            return chat_reply_payload(response, None, context_report)
 
-        conversation = None
+        conversation, full_context, context_report = prepare_chat_turn(
+            user_message, user_id, conversation_id
+        )
 
-        # ---------- For logged-in users: prepare conversation + save user message ----------
-        if user_id:
-            if conversation_id:
-                conversation = (
-                    AiConversation.query.filter_by(
-                        id=conversation_id, user_id=user_id
-                    ).first()
-                )
+        # ---------- Get AI response ----------
+        response, _ = chatbot.answer(user_message, full_context, conversation.id)
 
-            if conversation is None:
-                # Create new conversation; first user message is used as title
-                conversation = AiConversation(
-                    user_id=user_id,
-                    title=user_message[:80],
-                )
-                db.session.add(conversation)
-                db.session.flush()  # so conversation.id exists
-
-            # save user message (not committed yet)
-            db.session.add(
-                AiMessage(
-                    conversation_id=conversation.id,
-                    sender="user",
-                    text=user_message,
-                )
-            )
+        finish_chat_turn(user_id, conversation, user_message, response)
 
-        # ---------- CONTEXT: SYSTEM INSTRUCTION + UNIVERSITY DATA + USER PROFILE + USER HISTORY ----------
+        return chat_reply_payload(response, conversation, context_report)
 
-        # 1) Strong system-level context to avoid "Haseeb" issue
-        system_context_lines = [
-            "You are the official Ask-PAFIAST AI assistant.",
-            "Use ONLY these sources when answering:",
-            "  1) University knowledge from PAF-IAST (provided below).",
-            "  2) The current user's profile and role from the database (if given).",
-            "  3) The previous conversation history shown below, which belongs ONLY to this logged-in user.",
-            "",
-            "Important:",
-            "  - If any older notes or texts claim the user's name is 'Haseeb', IGNORE them completely.",
-            "  - Never assume the user is 'Haseeb' unless it is explicitly stated in the current user profile.",
-            "  - Prefer the user's profile (name, role, department, semester) from the DB over any other source.",
-        ]
-        system_context = "\n".join(system_context_lines)
+    except Exception as e:  # noqa: BLE001
+        db.session.rollback()
+        logging.error(f"API error: {str(e)}")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
-        # 2) University data knowledge via semantic search
-        kb_context = ""
+
+@app.route("/api/chat/batch", methods=["POST"])
+@jwt_required()
+def chat_batch():
+    """
+    Answer a list of independent questions (kiosks, FAQ generation):
+
+      {"questions": ["...", "..."]}
+      -> {"results": [{"index": 0, "question": "...", "response": "..."},
+                      {"index": 1, "question": "...", "error": "..."}]}
+
+    Signed-in callers only: one call can cost CHAT_BATCH_MAX_QUESTIONS
+    LLM calls. Questions the answer cache already knows are served from
+    it; retrieval for the rest runs as one vectorized pass, then the LLM
+    calls run on batch_executor (CHAT_BATCH_CONCURRENCY at a time).
+    Results keep the request order; one failing question does not fail
+    the others. Answers are stateless: no conversation, memory or
+    profile, so they are shared with the anonymous answer cache.
+    """
+    ensure_chatbot()
+    if chatbot is None:
+        return chatbot_unavailable()
+
+    data = request.get_json(force=True) or {}
+    questions = data.get("questions")
+    if not isinstance(questions, list) or not questions:
+        return jsonify({"error": "'questions' must be a non-empty list"}), 400
+    max_questions = app.config["CHAT_BATCH_MAX_QUESTIONS"]
+    if len(questions) > max_questions:
+        return jsonify({"error": f"At most {max_questions} questions per batch"}), 400
+
+    results = [{"index": i, "question": q} for i, q in enumerate(questions)]
+    todo = []
+    for item in results:
+        question = item["question"]
+        if not isinstance(question, str) or not question.strip():
+            item["error"] = "Empty question"
+        else:
+            item["question"] = question.strip()
+            todo.append(item)
+
+    try:
+        # one snapshot for lookup, retrieval and store (hot reloads swap chatbot.kb)
+        kb = chatbot.kb
+        index_hash = kb.index_hash
+        query_vecs = chatbot.embed_queries([item["question"] for item in todo]) if todo else []
+        misses = []
+        for item, query_vec in zip(todo, query_vecs):
+            cached = answer_cache.lookup(query_vec, index_hash)
+            if cached is not None:
+                item["response"] = cached
+            else:
+                misses.append((item, query_vec))
+        # retrieval only for the questions the cache could not answer
+        kb_lists = (
+            chatbot.retrieve_batch(
+                [item["question"] for item, _ in misses],
+                top_k=app.config["CONTEXT_KB_CHUNKS"],
+                kb=kb,
+            )
+            if misses
+            else []
+        )
+    except Exception as exc:  # noqa: BLE001
+        logging.error(f"Batch retrieval error: {exc}")
+        return jsonify({"error": "Internal server error", "details": str(exc)}), 500
+
+    futures = []
+    by_question = {}  # the same question twice in one batch is asked once
+    for (item, query_vec), kb_chunks in zip(misses, kb_lists):
+        key = normalize_query(item["question"])
+        if key not in by_question:
+            _, full_context, _ = prepare_chat_turn(item["question"], kb_chunks=kb_chunks)
+            by_question[key] = batch_executor.submit(
+                chatbot.answer, item["question"], full_context
+            )
+        futures.append((item, query_vec, by_question[key]))
+
+    for item, query_vec, future in futures:
         try:
-            kb_context = chatbot.semantic_search(user_message)
+            response, ok = future.result()
         except Exception as exc:  # noqa: BLE001
-            logging.warning(f"semantic_search error: {exc}")
-            kb_context = ""
-
-        # 3) User profile context from DB
-        user_profile_context = ""
-        if current_user:
-            parts = (current_user.full_name or "").split()
-            first_name = parts[0] if len(parts) > 0 else ""
-            last_name = " ".join(parts[1:]) if len(parts) > 1 else ""
-
-            user_profile_context_lines = [
-                "Current user profile from database:",
-                f"- Full name: {current_user.full_name or 'N/A'}",
-                f"- First name (preferred to use): {first_name or 'N/A'}",
-                f"- Last name: {last_name or 'N/A'}",
-                f"- Role: {current_user.role or 'N/A'}",
-                f"- Department: {current_user.department or 'N/A'}",
-                f"- Semester: {current_user.semester or 'N/A'}",
-                "",
-                "When you need the user's name, call them by their first name above.",
-            ]
-            user_profile_context = "\n".join(user_profile_context_lines)
-
-        # 4) Per-user conversational history (only for logged-in users)
-        history_context = build_user_history_context(user_id) if user_id else ""
-
-        # Compose final context
-        full_context_parts = [system_context]
-
-        if kb_context:
-            full_context_parts.append("University knowledge:\n" + kb_context)
-        if user_profile_context:
-            full_context_parts.append(user_profile_context)
-        if history_context:
-            full_context_parts.append(
-                "Previous conversation with this user:\n" + history_context
-            )
+            logging.warning(f"Batch answer error: {exc}")
+            response, ok = "Temporary issue. Please try again.", False
+        if ok:
+            item["response"] = response
+            answer_cache.store(item["question"], query_vec, response, index_hash)
+        else:
+            item["error"] = response
 
-        full_context = "\n\n".join(full_context_parts)
+    return jsonify({"results": results})
 
-        # ---------- Get AI response ----------
-        response = chatbot.get_response(user_message, full_context)
-
-        # ---------- Save AI reply to DB + per-user txt ----------
-        if user_id and conversation:
-            db.session.add(
-                AiMessage(
-                    conversation_id=conversation.id,
-                    sender="ai",
-                    text=response,
-                )
-            )
-            db.session.commit()
 
-            # also keep a per-user chat_history_<id>.txt file
-            append_user_history_file(user_id, user_message, response)
+STREAM_ERROR_TEXT = "Temporary issue. Please try again."
 
-        # NOTE: We no longer call chatbot.save_conversation(...) here,
-        # to avoid polluting a global text file with old persona/name info.
 
-        return jsonify(
-            {
-                "response": response,
-                "answer": response,
-                "reply": response,
-                "message": response,
-                "text": response,
-                "conversationId": conversation.id if conversation else None,
-            }
+def stream_chat_turn(user_message: str, user_id=None, conversation_id=None):
+    """
+    Generator shared by the SSE endpoint and the Socket.IO event. Yields
+    (event, data) tuples: "meta" once, "token" per delta, then "done" with
+    the full answer – or "error". The reply is saved as an AiMessage when
+    the stream ends: the full answer, the fallback text after an error, or
+    the part sent so far when the client goes away.
+    """
+    started = time.perf_counter()
+
+    kb = chatbot.kb  # retrieve from and cache under one index version
+    cached, query_vec = cached_answer_for(user_id, user_message, kb)
+    if cached is not None:
+        yield "meta", {"conversationId": None, "cached": True}
+        yield "token", {"text": cached}
+        yield "done", {"response": cached, "conversationId": None}
+        return
+
+    conversation, full_context, context_report = prepare_chat_turn(
+        user_message, user_id, conversation_id, kb=kb
+    )
+    # commit the user message now so the write lock is not held while streaming
+    db.session.commit()
+    conversation_id = conversation.id if conversation else None
+
+    parts = []
+    ttft_ms = None
+    error = None
+    try:
+        yield "meta", {"conversationId": conversation_id, "contextTokens": context_report}
+        with closing(chatbot.stream_answer(user_message, full_context, conversation_id)) as tokens:
+            for token in tokens:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    ttft_stats.record(ttft_ms)
+                parts.append(token)
+                yield "token", {"text": token}
+    except GeneratorExit:
+        # the client went away: keep what it was shown as the reply, so the
+        # committed prompt is not left unanswered
+        finish_chat_turn(
+            user_id, conversation, user_message, "".join(parts).strip() or STREAM_ERROR_TEXT
         )
+        raise
+    except CircuitOpenError:
+        error = "The assistant is temporarily unavailable. Please try again in a minute."
+    except Exception as exc:  # noqa: BLE001
+        logging.warning(f"Streaming error: {exc}")
+        error = STREAM_ERROR_TEXT
 
-    except Exception as e:  # noqa: BLE001
-        db.session.rollback()
-        logging.error(f"API error: {str(e)}")
-        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+    if error is not None:
+        # like /api/chat, the fallback text is saved as the reply
+        finish_chat_turn(user_id, conversation, user_message, error)
+        yield "error", {"error": error}
+        return
+
+    response = "".join(parts).strip()
+    if query_vec is not None:
+        answer_cache.store(user_message, query_vec, response, kb.index_hash)
+    finish_chat_turn(user_id, conversation, user_message, response)
+
+    yield "done", {
+        "response": response,
+        "conversationId": conversation_id,
+        "ttftMs": round(ttft_ms, 1) if ttft_ms is not None else None,
+    }
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+@jwt_required(optional=True)
+def chat_stream():
+    """
+    Same request body as /api/chat, but the answer is streamed back as
+    Server-Sent Events:
+
+      event: meta   data: {"conversationId": 12, ...}
+      event: token  data: {"text": "partial text"}      (repeated)
+      event: done   data: {"response": "full answer", "conversationId": 12, "ttftMs": 310.5}
+      event: error  data: {"error": "..."}
+    """
+    ensure_chatbot()
+    if chatbot is None:
+        return chatbot_unavailable()
+
+    data = request.get_json(force=True) or {}
+    user_message = (data.get("message") or "").strip()
+    if not user_message:
+        return jsonify({"error": "Empty message"}), 400
+
+    identity = get_jwt_identity()
+    user_id = int(identity) if identity is not None else None
+    conversation_id = data.get("conversationId")
+
+    def generate():
+        try:
+            for event, payload in stream_chat_turn(user_message, user_id, conversation_id):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logging.error(f"Stream API error: {exc}")
+            yield f"event: error\ndata: {json.dumps({'error': 'Internal server error'})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # -------------------------------------------------
@@ -452,6 +1161,7 @@ def list_ai_conversations():
 
     one_year_ago = datetime.utcnow() - timedelta(days=365)
 
+    # one query: the last-message preview is stored on the conversation row
     conversations = (
         AiConversation.query.filter(
             AiConversation.user_id == user_id,
@@ -463,11 +1173,6 @@ def list_ai_conversations():
 
     result = []
     for c in conversations:
-        last_msg = (
-            AiMessage.query.filter_by(conversation_id=c.id)
-            .order_by(AiMessage.created_at.desc())
-            .first()
-        )
         result.append(
             {
                 "id": c.id,
@@ -478,7 +1183,8 @@ def list_ai_conversations():
                 "updatedAt": c.updated_at.isoformat()
                 if c.updated_at
                 else None,
-                "lastSnippet": (last_msg.text[:120] + "…") if last_msg else "",
+                "messageCount": c.message_count or 0,
+                "lastSnippet": (c.last_snippet + "…") if c.last_message_id else "",
             }
         )
 
@@ -488,20 +1194,29 @@ def list_ai_conversations():
 @app.route("/api/ai/conversations/<int:conv_id>", methods=["GET"])
 @jwt_required()
 def get_ai_conversation(conv_id: int):
-    """Full messages for a single AI conversation."""
+    """
+    Messages of a single AI conversation, oldest first, one page at a time
+    (newest page unless ?before= / ?after= is given, see pagination.py).
+    """
     identity = get_jwt_identity()
     user_id = int(identity)
 
+    try:
+        page = page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     conversation = (
         AiConversation.query.filter_by(id=conv_id, user_id=user_id).first()
     )
     if not conversation:
         return jsonify({"error": "Conversation not found"}), 404
 
-    messages = (
-        AiMessage.query.filter_by(conversation_id=conversation.id)
-        .order_by(AiMessage.created_at.asc())
-        .all()
+    messages, page_info = keyset_page(
+        AiMessage.query.filter_by(conversation_id=conversation.id),
+        AiMessage.created_at,
+        AiMessage.id,
+        page,
     )
 
     return jsonify(
@@ -509,6 +1224,7 @@ def get_ai_conversation(conv_id: int):
             "conversationId": conversation.id,
             "title": conversation.title,
             "messages": [m.to_dict() for m in messages],
+            "page": page_info,
         }
     )
 
@@ -541,54 +1257,16 @@ def list_ai_history_dates():
 
     one_year_ago = datetime.utcnow() - timedelta(days=365)
 
+    # one range read on the (user_id, day) rollup, kept current on write
     rows = (
-        db.session.query(
-            func.date(AiMessage.created_at).label("day"),
-            func.count(AiMessage.id),
-            func.min(AiMessage.created_at),
-            func.max(AiMessage.created_at),
-        )
-        .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
-        .filter(
-            AiConversation.user_id == user_id,
-            AiMessage.created_at >= one_year_ago,
+        DailyHistory.query.filter(
+            DailyHistory.user_id == user_id,
+            DailyHistory.day >= one_year_ago.date(),
         )
-        .group_by(func.date(AiMessage.created_at))
-        .order_by(func.date(AiMessage.created_at).desc())
+        .order_by(DailyHistory.day.desc())
         .all()
     )
-
-    result = []
-    for day, count, first_at, last_at in rows:
-        # normalize day to string
-        if hasattr(day, "isoformat"):
-            day_str = day.isoformat()
-        else:
-            day_str = str(day)
-
-        # first user message of that day for snippet
-        first_user_msg = (
-            db.session.query(AiMessage)
-            .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
-            .filter(
-                AiConversation.user_id == user_id,
-                func.date(AiMessage.created_at) == day,
-                AiMessage.sender == "user",
-            )
-            .order_by(AiMessage.created_at.asc(), AiMessage.id.asc())
-            .first()
-        )
-        snippet = (first_user_msg.text[:120] + "…") if first_user_msg else ""
-
-        result.append(
-            {
-                "date": day_str,
-                "count": int(count),
-                "firstAt": first_at.isoformat() if first_at else None,
-                "lastAt": last_at.isoformat() if last_at else None,
-                "snippet": snippet,
-            }
-        )
+    result = [row.to_dict() for row in rows]
 
     return jsonify({"dates": result})
 
@@ -597,7 +1275,8 @@ def list_ai_history_dates():
 @jwt_required()
 def get_ai_history_for_date(date_str: str):
     """
-    Returns Q&A pairs for a given date.
+    Returns Q&A pairs for a given date, paged by prompt (newest page unless
+    ?before= / ?after= is given, see pagination.py).
 
     Response:
     {
@@ -611,7 +1290,8 @@ def get_ai_history_for_date(date_str: str):
           "replyCreatedAt": "..."
         },
         ...
-      ]
+      ],
+      "page": {"limit": 50, "hasMore": false, "before": "...", "after": "..."}
     }
     """
     identity = get_jwt_identity()
@@ -622,10 +1302,14 @@ def get_ai_history_for_date(date_str: str):
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    start = datetime.combine(day, datetime.min.time())
-    end = start + timedelta(days=1)
+    try:
+        page = page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    start, end = day_bounds(day)
 
-    msgs = (
+    day_messages = (
         db.session.query(AiMessage)
         .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
         .filter(
@@ -633,15 +1317,43 @@ def get_ai_history_for_date(date_str: str):
             AiMessage.created_at >= start,
             AiMessage.created_at < end,
         )
-        .order_by(AiMessage.created_at.asc(), AiMessage.id.asc())
-        .all()
+    )
+    prompts, page_info = keyset_page(
+        day_messages.filter(AiMessage.sender == "user"),
+        AiMessage.created_at,
+        AiMessage.id,
+        page,
     )
 
+    msgs = []
+    if prompts:
+        # everything from the page's first prompt to its last, plus the
+        # message right after it (the last prompt's reply, if any)
+        first = (prompts[0].created_at, prompts[0].id)
+        last = (prompts[-1].created_at, prompts[-1].id)
+        msgs = [
+            m
+            for m in day_messages.filter(
+                AiMessage.created_at >= first[0], AiMessage.created_at <= last[0]
+            )
+            .order_by(AiMessage.created_at.asc(), AiMessage.id.asc())
+            .all()
+            if first <= (m.created_at, m.id) <= last
+        ]
+        following = (
+            day_messages.filter(newer_than(AiMessage.created_at, AiMessage.id, last))
+            .order_by(AiMessage.created_at.asc(), AiMessage.id.asc())
+            .first()
+        )
+        if following is not None:
+            msgs.append(following)
+
+    page_ids = {p.id for p in prompts}
     pairs = []
     i = 0
     while i < len(msgs):
         m = msgs[i]
-        if m.sender == "user":
+        if m.sender == "user" and m.id in page_ids:
             reply_text = None
             reply_at = None
 
@@ -671,7 +1383,7 @@ def get_ai_history_for_date(date_str: str):
             )
         i += 1
 
-    return jsonify({"date": date_str, "pairs": pairs})
+    return jsonify({"date": date_str, "pairs": pairs, "page": page_info})
 
 
 @app.route("/api/ai/history/dates/<string:date_str>", methods=["DELETE"])
@@ -689,8 +1401,7 @@ def delete_ai_history_for_date(date_str: str):
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    start = datetime.combine(day, datetime.min.time())
-    end = start + timedelta(days=1)
+    start, end = day_bounds(day)
 
     msgs = (
         AiMessage.query.join(AiConversation, AiConversation.id == AiMessage.conversation_id)
@@ -706,6 +1417,7 @@ def delete_ai_history_for_date(date_str: str):
         return jsonify({"message": "No messages for that date"}), 200
 
     conv_ids = {m.conversation_id for m in msgs}
+    days = {m.created_at.date() for m in msgs}
 
     for m in msgs:
         db.session.delete(m)
@@ -720,7 +1432,11 @@ def delete_ai_history_for_date(date_str: str):
             if conv and conv.user_id == user_id:
                 db.session.delete(conv)
 
+    sync_conversation_stats(AiConversation.id.in_(conv_ids))
+    rebuild_daily_history(user_id, days)
     db.session.commit()
+    forget_conversation_memory(conv_ids)
+    reset_conversation_summaries(conv_ids)
     return jsonify({"message": "All chats for that date deleted"})
 
 
@@ -758,17 +1474,25 @@ def delete_ai_pair(prompt_id: int):
         .first()
     )
 
+    days = {prompt_msg.created_at.date()}
     if reply_msg and reply_msg.sender == "ai":
+        days.add(reply_msg.created_at.date())
         db.session.delete(reply_msg)
 
     db.session.delete(prompt_msg)
     db.session.flush()
 
-    remaining = AiMessage.query.filter_by(conversation_id=conv.id).first()
+    conv_id = conv.id
+    remaining = AiMessage.query.filter_by(conversation_id=conv_id).first()
     if not remaining:
         db.session.delete(conv)
+    else:
+        sync_conversation_stats(AiConversation.id == conv_id)
+    rebuild_daily_history(user_id, days)
 
     db.session.commit()
+    forget_conversation_memory([conv_id])
+    reset_conversation_summaries([conv_id])
     return jsonify({"message": "Chat pair deleted"})
 
 
@@ -1212,14 +1936,20 @@ def list_users():
     caller_role = jwt_data.get("role")
 
     if caller_role in ("ADMIN", "SUB_ADMIN"):
-        users = User.query.order_by(User.created_at.desc()).all()
-        return jsonify({"users": [u.to_dict() for u in users]})
+        query = User.query
+    elif caller_role == "STUDENT_ORGANIZER":
+        query = User.query.filter_by(role="STUDENT")
+    else:
+        return jsonify({"error": "Not authorized"}), 403
 
-    if caller_role == "STUDENT_ORGANIZER":
-        users = User.query.filter_by(role="STUDENT").all()
-        return jsonify({"users": [u.to_dict() for u in users]})
+    try:
+        page = page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify({"error": "Not authorized"}), 403
+    # newest accounts first; ?before= pages towards older ones
+    users, page_info = keyset_page(query, User.created_at, User.id, page, newest_first=True)
+    return jsonify({"users": [u.to_dict() for u in users], "page": page_info})
 
 
 # -------------------------------------------------
@@ -1282,8 +2012,31 @@ def delete_user(user_id):
     if not can_user_manage(caller_role, user.role):
         return jsonify({"error": "Not authorized"}), 403
 
+    # support threads are shared with the other participant, so they are
+    # never deleted along with one of them
+    in_user_threads = db.or_(
+        ChatThread.student_id == user.id, ChatThread.consultant_id == user.id
+    )
+    if ChatThread.query.filter(in_user_threads).first() is not None:
+        return (
+            jsonify({"error": "User has support chat threads and cannot be deleted"}),
+            409,
+        )
+
+    # the user's own AI history goes first: SQLite does not enforce the
+    # foreign keys, but Postgres rejects the DELETE while any row is left
+    conv_ids = [
+        cid for (cid,) in db.session.query(AiConversation.id).filter_by(user_id=user.id)
+    ]
+    AiMessage.query.filter(AiMessage.conversation_id.in_(conv_ids)).delete(
+        synchronize_session=False
+    )
+    AiConversation.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+    DailyHistory.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+
     db.session.delete(user)
     db.session.commit()
+    forget_conversation_memory(conv_ids)
 
     return jsonify({"message": "User deleted"})
 
@@ -1423,12 +2176,19 @@ def get_thread_messages(thread_id):
     if user.id not in (thread.student_id, thread.consultant_id):
         return jsonify({"error": "Not authorized"}), 403
 
-    messages = (
-        ChatMessage.query.filter_by(thread_id=thread.id)
-        .order_by(ChatMessage.created_at.asc())
-        .all()
+    try:
+        page = page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # oldest first; newest page unless ?before= / ?after= is given
+    messages, page_info = keyset_page(
+        ChatMessage.query.filter_by(thread_id=thread.id),
+        ChatMessage.created_at,
+        ChatMessage.id,
+        page,
     )
-    return jsonify({"messages": [m.to_dict() for m in messages]})
+    return jsonify({"messages": [m.to_dict() for m in messages], "page": page_info})
 
 
 # =============================================================================
@@ -1503,6 +2263,51 @@ def handle_send_message(data):
     emit("new_message", payload, room=room_name)
 
 
+@socketio.on("ask_bot")
+def handle_ask_bot(data):
+    """
+    Streamed AI answer over Socket.IO.
+
+    data = {
+        "token": "<JWT>",          # optional – anonymous if missing
+        "message": "question",
+        "conversationId": 12       # optional
+    }
+
+    Emits to the caller only: "bot_start" {conversationId}, then
+    "bot_token" {text} per delta, then "bot_done" {response, conversationId,
+    ttftMs} – or "bot_error" {error}.
+    """
+    data = data or {}
+    user_message = (data.get("message") or "").strip()
+    if not user_message:
+        emit("bot_error", {"error": "Empty message"})
+        return
+
+    token = data.get("token")
+    user = get_user_from_token(token) if token else None
+    if token and not user:
+        emit("error", {"message": "Unauthorized"})
+        return
+
+    ensure_chatbot()
+    if chatbot is None:
+        emit("bot_error", {"error": "Chatbot failed to initialize on server."})
+        return
+
+    names = {"meta": "bot_start", "token": "bot_token", "done": "bot_done", "error": "bot_error"}
+    try:
+        for event, payload in stream_chat_turn(
+            user_message, user.id if user else None, data.get("conversationId")
+        ):
+            emit(names[event], payload)
+            socketio.sleep(0)  # let the server flush each token
+    except Exception as exc:  # noqa: BLE001
+        db.session.rollback()
+        logging.error(f"Socket ask_bot error: {exc}")
+        emit("bot_error", {"error": "Internal server error"})
+
+
 # ====================================================================================
 # ============================ RETURN 404 FOR UNKNOWN ROUTE ==========================
 # ====================================================================================
@@ -1517,9 +2322,6 @@ def not_found(_):
 if __name__ == "__main__":
     from os import environ
 
-    with app.app_context():
-        db.create_all()
-
     # Railway (and most platforms) give you a PORT env variable
     port = int(environ.get("PORT", 5001))
 
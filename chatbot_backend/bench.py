@@ -0,0 +1,298 @@
+# chatbot_backend/bench.py
+"""
+Small micro-benchmarks for the chatbot backend.
+
+Run from the chatbot_backend folder:
+
+    python bench.py retrieval
+    python bench.py startup
+    python bench.py embeddings   # parity + latency/RSS of the embedding backends
+    python bench.py mmr          # redundancy of the top-k with and without MMR
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from retrieval import VectorIndex, mmr_rerank, normalize_rows
+
+
+def _per_call_us(fn, repeat=2000):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_retrieval(n_chunks=200, dim=384, top_k=3, repeat=2000):
+    """Per-query latency of VectorIndex vs the old sklearn NearestNeighbors."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((n_chunks, dim)).astype(np.float32)
+    query = rng.standard_normal((1, dim)).astype(np.float32)
+    batch = rng.standard_normal((32, dim)).astype(np.float32)
+
+    index = VectorIndex(embeddings)
+    print(f"corpus: {n_chunks} x {dim}, top_k={top_k}")
+    print(f"  VectorIndex (1 query)    : {_per_call_us(lambda: index.search(query, top_k), repeat):8.1f} us/query")
+    batch_us = _per_call_us(lambda: index.search(batch, top_k), repeat // 10)
+    print(f"  VectorIndex (batch of 32): {batch_us / len(batch):8.1f} us/query")
+
+    try:
+        from sklearn.neighbors import NearestNeighbors
+    except ImportError:
+        print("  sklearn not installed – skipping NearestNeighbors baseline")
+        return
+
+    nn = NearestNeighbors(n_neighbors=top_k, metric="cosine").fit(embeddings)
+    print(f"  sklearn NearestNeighbors : {_per_call_us(lambda: nn.kneighbors(query, n_neighbors=top_k), repeat):8.1f} us/query")
+
+
+# modules that must not be imported just to serve /api/health
+HEAVY_MODULES = ("sentence_transformers", "torch", "transformers", "sklearn", "tenacity")
+
+_FIRST_HEALTHY = """
+import json, time
+t0 = time.perf_counter()
+import app
+app.app.test_client().get("/api/health")
+report = dict(app.startup_report, wallMs=round((time.perf_counter() - t0) * 1000, 1))
+print(json.dumps(report))
+"""
+
+
+def bench_startup(top=12):
+    """
+    Cold-start report for app.py in a fresh interpreter (warmup disabled):
+    per-module import times from `python -X importtime` and the time until
+    /api/health first answers. Note: importing app.py opens users.db.
+    """
+    env = dict(os.environ, CHATBOT_WARMUP="0")
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        env=env, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip(" "))
+        rows.append((name.strip(), int(cumulative_us), depth))
+
+    # modules app.py imports directly sit one nesting level below "app"
+    app_depth = next((r[2] for r in rows if r[0] == "app"), 1)
+    direct = sorted((r for r in rows if r[2] == app_depth + 2), key=lambda r: r[1], reverse=True)
+    print("slowest direct imports of app.py (cumulative):")
+    for name, cumulative_us, _ in direct[:top]:
+        print(f"  {name:<28} {cumulative_us / 1000:8.1f} ms")
+    loaded = {r[0].split(".")[0] for r in rows}
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    print(f"heavy modules imported at startup: {', '.join(heavy) or 'none'}")
+
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_HEALTHY], env=env, capture_output=True, text=True
+    )
+    try:
+        report = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        print(f"could not measure first healthy response:\n{proc.stderr[-500:]}")
+        return
+    print(f"app.py import          : {report['appImportMs']:8.1f} ms")
+    print(f"first /api/health 200  : {report['firstHealthyResponseMs']:8.1f} ms after app.py started")
+    print(f"interpreter-side total : {report['wallMs']:8.1f} ms")
+
+
+SAMPLE_QUERIES = [
+    "What is the minimum CGPA to avoid probation?",
+    "hostel fee",
+    "How many credit hours can I transfer from another university?",
+    "attendance requirement for final exams",
+    "Who approves a semester freeze?",
+    "CS-101",
+]
+
+# min cosine between torch and onnx-int8 vectors of the same text
+PARITY_MIN_COSINE = 0.98
+
+_EMBED_PROBE = """
+import json, sys, time
+import numpy as np
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+backend_name, out_path, texts_path = sys.argv[1:4]
+with open(texts_path, encoding="utf-8") as f:
+    texts = json.load(f)
+
+import os
+import embeddings
+options = {}
+if backend_name == "onnx-int8":
+    options = {
+        "model_dir": os.getenv("ONNX_MODEL_DIR") or None,
+        "model_file": os.getenv("ONNX_MODEL_FILE", embeddings.ONNX_INT8_FILE),
+    }
+rss0 = rss_mb()
+t0 = time.perf_counter()
+backend = embeddings.load_backend(
+    backend_name, os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"), **options
+)
+load_ms = (time.perf_counter() - t0) * 1000
+
+backend.encode(texts[:1])  # warm up
+t0 = time.perf_counter()
+for _ in range(20):
+    backend.encode(texts[:1])
+single_ms = (time.perf_counter() - t0) * 1000 / 20
+t0 = time.perf_counter()
+vectors = backend.encode(texts)
+batch_ms = (time.perf_counter() - t0) * 1000
+
+np.save(out_path, vectors)
+print(json.dumps({
+    "loadMs": load_ms, "singleMs": single_ms, "batchMs": batch_ms,
+    "texts": len(texts), "rssMb": rss_mb() - rss0,
+}))
+"""
+
+
+def bench_embeddings(backends=("torch", "onnx-int8"), n_chunks=64):
+    """
+    Encode latency, load time and resident memory of each embedding backend
+    (each in a fresh interpreter), then the parity check: row-wise cosine
+    between torch and onnx-int8 vectors and top-3 retrieval agreement.
+    Honours EMBEDDING_MODEL, ONNX_MODEL_DIR and ONNX_MODEL_FILE like test.py.
+    """
+    from chunking import chunk_document
+
+    with open("university_data.txt", encoding="utf-8") as f:
+        chunks = [c["text"] for c in chunk_document(f.read())][:n_chunks]
+    texts = SAMPLE_QUERIES + chunks
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+
+        for name in backends:
+            out_path = os.path.join(tmp, f"{name}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-c", _EMBED_PROBE, name, out_path, texts_path],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{name:<10} unavailable: {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            stats = json.loads(proc.stdout.strip().splitlines()[-1])
+            results[name] = np.load(out_path)
+            print(
+                f"{name:<10} load {stats['loadMs']:8.1f} ms | 1 query {stats['singleMs']:6.2f} ms"
+                f" | {stats['texts']} texts {stats['batchMs']:8.1f} ms | +RSS {stats['rssMb']:6.1f} MB"
+            )
+
+    if "torch" not in results or "onnx-int8" not in results:
+        print("parity: skipped (needs both backends)")
+        return
+
+    a = normalize_rows(results["torch"])
+    b = normalize_rows(results["onnx-int8"])
+    cos = (a * b).sum(axis=1)
+    print(f"parity cosine: mean {cos.mean():.4f}  min {cos.min():.4f}")
+
+    q = len(SAMPLE_QUERIES)
+    top_a = VectorIndex(a[q:]).search(a[:q], top_k=3)
+    top_b = VectorIndex(b[q:]).search(b[:q], top_k=3)
+    overlap = [
+        len({i for i, _ in ra} & {i for i, _ in rb}) / 3 for ra, rb in zip(top_a, top_b)
+    ]
+    print(f"top-3 retrieval agreement: {np.mean(overlap):.0%}")
+    print("parity:", "PASS" if cos.min() >= PARITY_MIN_COSINE else f"FAIL (< {PARITY_MIN_COSINE})")
+
+
+def _redundancy(vectors, ids):
+    """Mean pairwise cosine of the picked chunks and how many pairs are near-duplicates."""
+    if len(ids) < 2:
+        return 0.0, 0
+    sims = vectors[ids] @ vectors[ids].T
+    pairs = sims[np.triu_indices(len(ids), k=1)]
+    return float(pairs.mean()), int((pairs >= 0.9).sum())
+
+
+def bench_mmr(top_k=3, lambdas=(1.0, 0.7, 0.5)):
+    """
+    Redundancy of the retrieved top-k with and without MMR (lambda=1 is
+    the plain ranking). First on a synthetic corpus where every passage
+    exists in three near-identical copies and each query is about two
+    passages, then on the real knowledge base
+    through the Assistant (needs the embedding model).
+    """
+    rng = np.random.default_rng(0)
+    topics = normalize_rows(rng.standard_normal((40, 384)))
+    copies = np.repeat(topics, 3, axis=0) + 0.25 * rng.standard_normal((120, 384)) / np.sqrt(384)
+    vectors = normalize_rows(copies)
+    # each query is about two passages (one slightly more than the other)
+    queries = normalize_rows(topics[0:20:2] + 0.9 * topics[1:20:2])
+    hits = VectorIndex(vectors).search(queries, top_k=12)
+
+    print(f"synthetic corpus: 40 passages x 3 near-copies, top_k={top_k}")
+    for lam in lambdas:
+        stats = [
+            _redundancy(vectors, [i for i, _ in mmr_rerank(h, vectors, top_k=top_k, lambda_=lam)])
+            for h in hits
+        ]
+        print(
+            f"  lambda={lam:<4} mean pairwise cosine {np.mean([s[0] for s in stats]):.3f}"
+            f" | near-duplicate pairs {sum(s[1] for s in stats)}"
+        )
+
+    try:
+        from test import Assistant
+
+        bot = Assistant()
+    except Exception as exc:  # noqa: BLE001
+        print(f"knowledge base: skipped ({exc})")
+        return
+
+    kb = bot.kb
+    print(f"knowledge base: {len(kb)} chunks, {len(SAMPLE_QUERIES)} sample queries, top_k={top_k}")
+    for lam in lambdas:
+        bot.mmr_lambda = lam
+        results = bot.search_chunks_batch(SAMPLE_QUERIES, top_k=top_k, kb=kb, mmr=True)
+        stats = [_redundancy(kb.vectors, [i for i, _ in h]) for h in results]
+        print(
+            f"  lambda={lam:<4} mean pairwise cosine {np.mean([s[0] for s in stats]):.3f}"
+            f" | near-duplicate pairs {sum(s[1] for s in stats)}"
+        )
+
+
+BENCHMARKS = {
+    "retrieval": bench_retrieval,
+    "startup": bench_startup,
+    "embeddings": bench_embeddings,
+    "mmr": bench_mmr,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[name]()
@@ -0,0 +1,234 @@
+# chatbot_backend/caches.py
+"""
+In-process caches used on the chat path.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical form of a question used as a cache key:
+    lower-cased, whitespace collapsed, trailing punctuation dropped.
+    "What is  CGPA?" and "what is cgpa" map to the same key.
+    """
+    text = _WHITESPACE_RE.sub(" ", (text or "").strip().lower())
+    return text.rstrip(" ?!.,;:")
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = max(1, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SemanticAnswerCache:
+    """
+    Stores finished answers keyed by the question's embedding.
+
+    A lookup is a hit when the best stored question has cosine similarity
+    >= `threshold` with the new one. Entries expire after `ttl` seconds and
+    the whole cache is dropped as soon as the knowledge-base index hash it
+    was filled against changes.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, maxsize: int = 512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = max(1, int(maxsize))
+        self.index_hash = None
+        self._entries = OrderedDict()  # normalized question -> entry dict
+        self._matrix = None  # stacked unit vectors, rebuilt lazily
+        self._keys = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _unit(vec) -> np.ndarray:
+        vec = np.asarray(vec, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _check_index(self, index_hash) -> None:
+        if index_hash != self.index_hash:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+            self.index_hash = index_hash
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if now - e["created_at"] > self.ttl]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, query_vec, index_hash):
+        """Return the cached answer for a near-identical question, or None."""
+        with self._lock:
+            self._check_index(index_hash)
+            self._purge_expired(time.time())
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.vstack([self._entries[k]["vec"] for k in self._keys])
+
+            sims = self._matrix @ self._unit(query_vec)
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]["answer"]
+
+    def store(self, question: str, query_vec, answer: str, index_hash) -> None:
+        with self._lock:
+            self._check_index(index_hash)
+            key = normalize_query(question)
+            self._entries[key] = {
+                "vec": self._unit(query_vec),
+                "answer": answer,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller (the
+    leader) runs the function, callers arriving while it is in flight wait
+    for and share its result – or its exception. Nothing is kept once the
+    call finishes; that is what the caches above are for.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Return (result, shared); shared is True for coalesced callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = self._Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        total = self.executions + self.coalesced
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "inFlight": in_flight,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalescingRatio": round(self.coalesced / total, 4) if total else 0.0,
+        }
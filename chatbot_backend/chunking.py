@@ -0,0 +1,322 @@
+# chatbot_backend/chunking.py
+"""
+Structure-aware chunking of the knowledge-base text files.
+
+university_data.txt is loosely markdown:
+
+    ## - 3. Transfer Policy                  <- top-level section
+    Credit Transfer from another University  <- short title line
+    ### - Transfer ... is possible if:       <- list intro
+    - a) ...                                 <- lettered list run
+    - b) ...
+
+Chunks never straddle a heading, list runs and blank-line paragraphs are
+kept whole where they fit, and every chunk carries the title of the
+section it came from. A heading always travels with the content below
+it; no chunk is only a heading. Oversized sections are split on line
+boundaries (overlong lines between words) with a small overlap so no
+rule loses its lead-in.
+"""
+import math
+import re
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s*-?\s*(.*)$")
+_BULLET_RE = re.compile(r"^\s*(-|\*|\d+[.)]|[a-z][.)])\s+")
+_LETTERED_RE = re.compile(r"^\s*-\s*([a-z]|[ivx]+)\)\s")
+
+DEFAULT_MAX_SIZE = 700
+DEFAULT_OVERLAP = 120
+
+# bump when the same text and parameters would produce different chunks,
+# so stored indexes are rebuilt
+CHUNKER_VERSION = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English BPE
+    vocabularies). Good enough for budgeting; no tokenizer download needed.
+    """
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _measure(unit: str):
+    return estimate_tokens if unit == "tokens" else len
+
+
+def _clean_title(text: str) -> str:
+    return text.strip().lstrip("#").strip().lstrip("-").strip().rstrip(":").strip()
+
+
+def _title_like(text: str) -> bool:
+    """A few capitalised words ('Campus Highlights'), not a sentence."""
+    words = text.split()
+    long_words = [w for w in words if len(w) > 3]
+    capitalised = sum(1 for w in long_words if w[0].isupper() or not w[0].isalpha())
+    return (
+        0 < len(words) <= 8
+        and (text[0].isupper() or text[0].isdigit())
+        and capitalised * 2 >= len(long_words)
+    )
+
+
+def _is_heading(line: str) -> bool:
+    """
+    '#' lines that name a section. '### Campus Highlights:' is a heading;
+    '### - Grades are interpreted as follows:' introduces a list, and
+    formulas ('## - Sgpa = ...') are content.
+    """
+    m = _HEADING_RE.match(line)
+    if not m:
+        return False
+    body = m.group(2).strip()
+    if not body or len(body) > 80 or "=" in body:
+        return False
+    if body.endswith(":"):
+        dashed = line.lstrip("#").lstrip().startswith("-")
+        return not dashed and _title_like(body.rstrip(":").strip())
+    return True
+
+
+def _is_title_line(line: str, next_line: str) -> bool:
+    """
+    Short plain title followed by content, e.g. 'Academic Year'. Facts
+    such as 'Total Hostels: 2' or sentences are not titles.
+    """
+    stripped = line.strip()
+    return (
+        bool(stripped)
+        and bool(next_line.strip())
+        and not _BULLET_RE.match(stripped)
+        and not stripped.startswith("#")
+        and len(stripped) <= 60
+        and ":" not in stripped
+        and stripped[-1] not in ".;,?!"
+        and _title_like(stripped)
+    )
+
+
+def _blocks(lines):
+    """
+    Group a paragraph's lines into atomic blocks: a list intro ending in
+    ':' sticks to the list run that follows it, and a lettered run
+    (a), b), c) ...) is one block.
+    """
+    blocks = []
+    current = []
+    in_run = False
+    for line in lines:
+        lettered = bool(_LETTERED_RE.match(line))
+        if lettered and (in_run or (current and current[-1].rstrip().endswith(":"))):
+            current.append(line)
+            in_run = True
+            continue
+        if current:
+            blocks.append(current)
+        current = [line]
+        in_run = lettered
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def chunk_document(text: str, max_size=DEFAULT_MAX_SIZE, overlap=DEFAULT_OVERLAP, unit="chars"):
+    """
+    Split `text` into chunks of at most `max_size` (characters, or
+    estimated tokens when unit="tokens"). The budget is a hard cap: it
+    includes the "(continued)" header, and a line longer than the budget
+    is cut on word boundaries.
+
+    Returns a list of {"text", "section", "line"} dicts where "line" is
+    the 1-based line number the chunk starts at.
+    """
+    measure = _measure(unit)
+    lines = text.split("\n")
+
+    # 1) Walk the file and cut it into (section, start_line, [lines]) sections
+    sections = []
+    top = ""
+    sub = ""
+    title = ""
+    current = None
+
+    def open_section(start, heading=None):
+        label = " > ".join(t for t in (top, sub, title) if t)
+        section = {"section": label, "line": start, "lines": [], "titles": set()}
+        if heading is not None:
+            section["lines"].append(heading)
+            section["titles"].add(heading)
+        sections.append(section)
+        return section
+
+    for i, raw in enumerate(lines):
+        line = raw.rstrip()
+        next_line = next((ln for ln in lines[i + 1:i + 4] if ln.strip()), "")
+
+        if _is_heading(line):
+            level = len(_HEADING_RE.match(line).group(1))
+            if level <= 2:
+                top, sub = _clean_title(line), ""
+            else:
+                sub = _clean_title(line)
+            title = ""
+            current = open_section(i + 1, line)
+            continue
+
+        # a title either opens a paragraph or directly follows a list run
+        prev_line = lines[i - 1] if i > 0 else ""
+        after_break = not prev_line.strip() or bool(_BULLET_RE.match(prev_line))
+        if after_break and _is_title_line(line, next_line):
+            if _is_heading(next_line.rstrip()):
+                # 'Code of Conduct' above '### ...' headings: a top-level title
+                top, sub, title = _clean_title(line), "", ""
+            else:
+                title = _clean_title(line)
+            current = open_section(i + 1, line)
+            continue
+
+        if current is None:
+            current = open_section(i + 1)
+        current["lines"].append(line)
+
+    # 2) Pack each section's paragraphs/blocks into size-bounded chunks.
+    # A section that is nothing but its heading ('## - 2. Grading ...'
+    # right above 'Grade Point Average') is carried into the next one.
+    chunks = []
+    carry = None
+    for sec in sections:
+        paragraphs = []
+        para = []
+        for line in sec["lines"]:
+            if line.strip():
+                para.append(line)
+            elif para:
+                paragraphs.append(para)
+                para = []
+        if para:
+            paragraphs.append(para)
+
+        titles = set(sec["titles"])
+        start_line = sec["line"]
+        if carry is not None:
+            paragraphs = carry["paragraphs"] + paragraphs
+            titles |= carry["titles"]
+            start_line = carry["line"]
+            carry = None
+        if all(line in titles for para in paragraphs for line in para):
+            if paragraphs:
+                carry = {"paragraphs": paragraphs, "titles": titles, "line": start_line}
+            continue
+
+        units = []  # each unit is a list of lines we prefer not to split
+        for para in paragraphs:
+            if measure("\n".join(para)) <= max_size:
+                units.append(para)
+            else:
+                units.extend(_blocks(para))
+
+        chunks.extend(
+            _pack(units, sec["section"], start_line, titles, max_size, overlap, measure)
+        )
+
+    return chunks
+
+
+def _cut_line(line: str, fits):
+    """
+    Split `line` into (head, rest) with the longest head that `fits`,
+    cutting between words where possible. head is "" if nothing fits.
+    """
+    words = line.split(" ")
+    head = ""
+    for n in range(1, len(words) + 1):
+        candidate = " ".join(words[:n])
+        if not fits(candidate):
+            break
+        head = candidate
+    if not head:
+        # one word longer than the budget: cut it by characters
+        lo, hi = 0, len(line)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if fits(line[:mid]):
+                lo = mid
+            else:
+                hi = mid - 1
+        head = line[:lo]
+    return head, line[len(head):].lstrip()
+
+
+def _pack(units, section, start_line, titles, max_size, overlap, measure):
+    chunks = []
+    buf = []
+
+    header = f"{section.split(' > ')[-1]} (continued)" if section else ""
+    if measure(header) > max_size // 3:
+        header = ""  # would leave too little room for the content
+    titles = titles | {header}
+
+    def has_content(lines):
+        return any(line.strip() and line not in titles for line in lines)
+
+    def fits(lines):
+        return measure("\n".join(lines)) <= max_size
+
+    def flush():
+        body = "\n".join(buf).strip()
+        if has_content(buf):
+            chunks.append({"text": body, "section": section, "line": start_line})
+
+    def tail_for_overlap():
+        tail = []
+        for line in reversed(buf):
+            if measure("\n".join([line] + tail)) > overlap:
+                break
+            tail.insert(0, line)
+        return tail
+
+    # (lines, own_paragraph): whole units are separated by a blank line,
+    # pieces of a split unit or line continue the one before
+    queue = [(unit, True) for unit in units]
+    while queue:
+        piece, own_paragraph = queue.pop(0)
+        if len(piece) > 1 and not fits(piece):
+            # a single block bigger than the budget is split line by line
+            queue[:0] = [([line], own_paragraph and i == 0) for i, line in enumerate(piece)]
+            continue
+
+        candidate = buf + ([""] if buf and own_paragraph else []) + piece
+        if fits(candidate):
+            buf = candidate
+            continue
+
+        if has_content(buf):
+            tail = tail_for_overlap()
+            flush()
+            buf = tail
+            if header and (not buf or _clean_title(buf[0]) not in section):
+                buf = [header] + buf
+            # the overlap is a nicety; drop it before splitting the piece
+            while has_content(buf) and not fits(buf + piece):
+                buf.pop(1 if buf[0] == header else 0)
+            if fits(buf + piece):
+                buf = buf + piece
+                continue
+
+        # buf only holds headings: split the piece instead of emitting them alone
+        if len(piece) > 1:
+            queue[:0] = [([line], False) for line in piece]
+            continue
+        head, rest = _cut_line(piece[0], lambda s: fits(buf + [s]))
+        if not head:
+            buf = []  # the headings alone fill the budget; keep the content
+            queue.insert(0, (piece, False))
+            continue
+        buf = buf + [head]
+        if rest:
+            queue.insert(0, ([rest], False))
+
+    flush()
+    return chunks
@@ -0,0 +1,103 @@
+# chatbot_backend/context_builder.py
+"""
+Token-budgeted prompt context for /api/chat.
+
+Each section (system rules, retrieved knowledge, user profile, history)
+gets a priority and an optional own cap. Sections are filled in priority
+order from one shared budget; when something has to go, a section drops
+whole items from its least useful end – lowest-ranked chunks, oldest
+history lines – instead of cutting the joined text at a fixed offset.
+"""
+from chunking import estimate_tokens
+
+DEFAULT_BUDGET = 1200
+
+
+class ContextAssembler:
+    def __init__(self, max_tokens: int = DEFAULT_BUDGET, count_tokens=estimate_tokens):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.sections = []
+
+    def add(self, name, items, priority, header="", max_tokens=None, drop="tail", joiner="\n"):
+        """
+        Register a section.
+
+        items      : ordered strings (ranked chunks, chronological lines ...)
+        priority   : 0 is filled first; higher numbers get what is left
+        max_tokens : optional cap for this section on top of the global one
+        drop       : "tail" drops the last items first (ranked lists),
+                     "head" drops the first items first (oldest history)
+        """
+        if isinstance(items, str):
+            items = [items]
+        items = [i for i in items if i and i.strip()]
+        if items:
+            self.sections.append(
+                {
+                    "name": name,
+                    "items": items,
+                    "priority": priority,
+                    "header": header,
+                    "max_tokens": max_tokens,
+                    "drop": drop,
+                    "joiner": joiner,
+                }
+            )
+        return self
+
+    def _render(self, section, items):
+        body = section["joiner"].join(items)
+        return f"{section['header']}\n{body}" if section["header"] else body
+
+    def _fit(self, section, budget):
+        """Largest run of items (dropping from the configured end) within budget."""
+        items = list(section["items"])
+        while items and self.count_tokens(self._render(section, items)) > budget:
+            if section["drop"] == "head":
+                items.pop(0)
+            else:
+                items.pop()
+
+        if not items and section["items"] and budget > 0:
+            # even one item is too big: keep the most important one, clipped
+            keep = section["items"][-1 if section["drop"] == "head" else 0]
+            header_tokens = self.count_tokens(section["header"]) if section["header"] else 0
+            chars = max(0, (budget - header_tokens) * 4)
+            if chars:
+                items = [keep[:chars].rstrip() + "…"]
+        return items
+
+    def build(self):
+        """
+        Return (context_text, report). Sections appear in the order they
+        were added; the report has per-section token counts and how many
+        items were dropped.
+        """
+        remaining = self.max_tokens
+        kept = {}
+        for section in sorted(self.sections, key=lambda s: s["priority"]):
+            budget = remaining
+            if section["max_tokens"] is not None:
+                budget = min(budget, section["max_tokens"])
+            items = self._fit(section, budget)
+            kept[section["name"]] = items
+            if items:
+                remaining -= self.count_tokens(self._render(section, items))
+
+        parts = []
+        report = {"budget": self.max_tokens, "sections": {}}
+        for section in self.sections:
+            items = kept[section["name"]]
+            text = self._render(section, items) if items else ""
+            if text:
+                parts.append(text)
+            report["sections"][section["name"]] = {
+                "tokens": self.count_tokens(text),
+                "items": len(items),
+                "dropped": len(section["items"]) - len(items),
+            }
+
+        context = "\n\n".join(parts)
+        report["total"] = self.count_tokens(context)
+        return context, report
@@ -0,0 +1,100 @@
+# chatbot_backend/db_config.py
+"""
+Database settings for the Flask app: which database, and how to talk to it.
+
+    DATABASE_URL unset       SQLite file instance/users.db (default)
+    DATABASE_URL=postgres... PostgreSQL via psycopg2, with a connection pool
+
+SQLite connections are tuned on connect: WAL journaling (readers no longer
+block the writer and vice versa), synchronous=NORMAL (fsync at checkpoints
+instead of every commit – safe in WAL mode), a busy timeout so concurrent
+writers from /api/chat and Socket.IO wait for the lock instead of failing
+with "database is locked", and a larger page cache.
+
+For Postgres, DB_POOL_SIZE connections are kept open per process, up to
+DB_MAX_OVERFLOW extra ones are opened under load, and a request waits up
+to DB_POOL_TIMEOUT seconds for a free one. The driver, psycopg2-binary, is
+in requirements.txt; nothing else changes – migrations.py creates the
+schema on first start. tests/test_backends.py runs against a local server
+when TEST_POSTGRES_URL is set.
+"""
+import os
+
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = "sqlite:///users.db"
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": -SQLITE_CACHE_SIZE_KB,  # negative = KiB, not pages
+    "temp_store": "MEMORY",
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))  # whole seconds
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def database_uri() -> str:
+    uri = os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URI
+    # Heroku/Railway hand out postgres://, which SQLAlchemy no longer accepts
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def engine_options(uri: str) -> dict:
+    if uri.startswith("sqlite"):
+        # the driver's own lock wait, in seconds; busy_timeout covers the rest
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        # drop connections the server or a proxy may have closed meanwhile
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def configure(app) -> None:
+    """Set SQLALCHEMY_DATABASE_URI / SQLALCHEMY_ENGINE_OPTIONS on `app`."""
+    uri = database_uri()
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(uri)
+
+
+def apply_sqlite_pragmas(engine) -> None:
+    """Run SQLITE_PRAGMAS on every new connection of `engine` (SQLite only)."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def describe(engine) -> dict:
+    """Backend + effective settings, for /api/metrics."""
+    info = {"backend": engine.dialect.name}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in SQLITE_PRAGMAS:
+                info[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    else:
+        pool = engine.pool
+        info.update(
+            poolSize=pool.size(),
+            checkedOut=pool.checkedout(),
+            overflow=pool.overflow(),
+            maxOverflow=DB_MAX_OVERFLOW,
+        )
+    return info
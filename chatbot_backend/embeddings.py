@@ -0,0 +1,264 @@
+# chatbot_backend/embeddings.py
+"""
+Embedding backends for the Assistant.
+
+Every backend turns a list of strings into a float32 matrix (one row per
+text) and has a short `name` that becomes part of the on-disk index key, so
+vectors from different backends never end up in the same artifact.
+
+    torch      sentence-transformers on PyTorch (default)
+    onnx-int8  the same all-MiniLM-L6-v2 weights, dynamically quantized to
+               int8 and run with ONNX Runtime; needs only `onnxruntime`,
+               `tokenizers` and `huggingface_hub` – no torch in the worker
+
+Select one with EMBEDDING_BACKEND. The ONNX backend downloads the
+quantized export published in the model's Hugging Face repo unless
+ONNX_MODEL_DIR points at a local folder with the .onnx file and
+tokenizer.json. To quantize your own export:
+
+    python embeddings.py quantize model.onnx model_int8.onnx
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import Histogram
+
+DEFAULT_BACKEND = "torch"
+
+# Quantized export shipped in sentence-transformers/all-MiniLM-L6-v2
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+ONNX_MAX_LENGTH = 256  # max_seq_length of all-MiniLM-L6-v2
+
+
+class EmbeddingBackend(ABC):
+    """Interface: encode(texts) -> float32 array of shape (len(texts), dim)."""
+
+    name = "base"
+
+    @abstractmethod
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        """Embed `texts`, one float32 row per text."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        # imported here so only workers that use this backend load torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        vectors = self.model.encode(
+            list(texts), batch_size=batch_size, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    Mean-pooled, L2-normalized sentence embeddings from an (int8) ONNX
+    export of a BERT-style encoder – the same pipeline sentence-transformers
+    runs for all-MiniLM-L6-v2.
+    """
+
+    name = "onnx-int8"
+
+    def __init__(self, model_name: str, model_dir=None, model_file=ONNX_INT8_FILE, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if model_dir:
+            model_path = os.path.join(model_dir, os.path.basename(model_file))
+            tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+
+            repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+            model_path = hf_hub_download(repo, model_file)
+            tokenizer_path = hf_hub_download(repo, "tokenizer.json")
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        # the arena keeps peak activation memory around forever; a worker
+        # mostly encodes single queries, so give it back instead
+        options.enable_cpu_mem_arena = False
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        texts = list(texts)
+        out = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            hidden = self.session.run(None, feed)[0]  # (batch, tokens, dim)
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            out.append(pooled / np.clip(norms, 1e-12, None))
+
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.vstack(out), dtype=np.float32)
+
+
+class BatchingEmbedder(EmbeddingBackend):
+    """
+    Wraps a backend so that concurrent small encode() calls – one question
+    per /api/chat request – are merged into one batch.
+
+    A single worker thread takes the first queued request. If nothing else
+    is queued it is encoded right away, so a lone question never waits.
+    Otherwise the worker takes everything already queued and keeps
+    collecting until `max_batch_size` texts are gathered or `max_wait_ms`
+    has passed, encodes them in one call and resolves each caller's future
+    with its own rows. Under load, requests pile up while a batch is being
+    encoded and leave together in the next one. Calls with at least
+    `max_batch_size` texts (index builds) go straight to the backend.
+
+    Callers block on a Future, so they must be real threads (threaded
+    server) or monkey-patched green threads. Under an eventlet hub without
+    eventlet.monkey_patch() the wait blocks the hub itself and nothing can
+    be batched; see `green_threads_unpatched()`.
+    """
+
+    def __init__(self, backend, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.backend = backend
+        self.name = backend.name
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self.queue_depth = Histogram([0, 1, 2, 4, 8, 16, 32])
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32])
+        self.batches = 0
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts) -> Future:
+        """Queue `texts`; the future resolves to their (len(texts), dim) matrix."""
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return self.backend.encode(texts, batch_size=batch_size)
+        if len(texts) >= self.max_batch_size:
+            return self.backend.encode(texts, batch_size=batch_size)
+        return self.submit(texts).result()
+
+    def _collect(self, first):
+        batch = [first]
+        size = len(first[0])
+        if self._queue.empty():
+            return batch, size  # nobody to wait for
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch, size = self._collect(first)
+            # requests still waiting when this batch leaves
+            self.queue_depth.observe(self._queue.qsize())
+            self.batch_sizes.observe(size)
+            self.batches += 1
+
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = self.backend.encode(texts, batch_size=max(size, 1))
+            except Exception as exc:  # noqa: BLE001
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[start:start + len(item_texts)])
+                start += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitMs": self.max_wait * 1000,
+            "batches": self.batches,
+            "queueDepth": self.queue_depth.stats(),
+            "batchSize": self.batch_sizes.stats(),
+        }
+
+
+def green_threads_unpatched() -> bool:
+    """
+    True when eventlet is loaded (Flask-SocketIO picks it for socketio.run)
+    but the threading module is not monkey-patched: every request then
+    runs on one OS thread, and BatchingEmbedder would only add a hop.
+    """
+    if "eventlet" not in sys.modules:
+        return False
+    from eventlet import patcher
+
+    return not patcher.is_monkey_patched("thread")
+
+
+BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxEmbeddingBackend.name: OnnxEmbeddingBackend,
+}
+
+
+def load_backend(name: str, model_name: str, **options) -> EmbeddingBackend:
+    """Instantiate the backend registered under `name`."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend '{name}'. Choose from: {', '.join(BACKENDS)}"
+        ) from None
+    return cls(model_name, **options)
+
+
+def quantize_onnx(src: str, dst: str) -> None:
+    """Dynamic int8 quantization of an fp32 ONNX export (weights only)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "quantize":
+        quantize_onnx(sys.argv[2], sys.argv[3])
+        print(f"Wrote {sys.argv[3]}")
+    else:
+        print("usage: python embeddings.py quantize <model.onnx> <model_int8.onnx>")
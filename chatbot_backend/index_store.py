@@ -0,0 +1,153 @@
+# chatbot_backend/index_store.py
+"""
+On-disk cache for the Assistant's embedding index.
+
+Every knowledge source has its own folder under INDEX_DIR, and each
+artifact lives in a sub-folder named after a key derived from the source
+content hash, the embedding model and the chunking parameters:
+
+    index_cache/<source>/<key>/
+        meta.json        # format version, model, source hash, shape ...
+        chunks.json      # chunk dicts (same order as the embedding rows)
+        embeddings.npy   # float32 matrix, unit-length rows, loaded with mmap on warm start
+
+If a source file or the model changes, the key changes and the index is
+rebuilt; otherwise a warm start only maps the .npy file.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# bump when the on-disk layout (or the meaning of its contents) changes
+INDEX_FORMAT_VERSION = 4
+
+# how many artifacts to keep around per index folder
+KEEP_ARTIFACTS = 3
+
+
+def content_hash(text: str) -> str:
+    """sha256 of the source text (what the chunks are built from)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def index_key(source_hash: str, model_name: str, params=None) -> str:
+    """Stable key for one (source, model, chunking params) combination."""
+    params_str = json.dumps(params or {}, sort_keys=True)
+    raw = f"v{INDEX_FORMAT_VERSION}|{source_hash}|{model_name}|{params_str}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def load_index(index_dir: str, key: str):
+    """
+    Return {"embeddings", "chunks", "meta"} for a stored artifact, or None
+    if it does not exist / is unreadable. Embeddings are memory mapped.
+    """
+    path = os.path.join(index_dir, key)
+    if not os.path.isdir(path):
+        return None
+
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "chunks.json"), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+    except Exception as e:  # noqa: BLE001
+        logging.warning(f"Index artifact {key} unreadable, rebuilding: {str(e)}")
+        return None
+
+    if meta.get("format") != INDEX_FORMAT_VERSION or embeddings.shape[0] != len(chunks):
+        logging.warning(f"Index artifact {key} is stale or inconsistent, rebuilding")
+        return None
+
+    return {"embeddings": embeddings, "chunks": chunks, "meta": meta}
+
+
+def load_latest_compatible(index_dir: str, model_name: str, params=None):
+    """
+    Newest stored artifact built with the same model and chunking params,
+    whatever the source content. Used to seed incremental rebuilds so that
+    unchanged chunks keep their embeddings across edits and deploys.
+    """
+    try:
+        names = [n for n in os.listdir(index_dir) if not n.startswith(".")]
+    except OSError:
+        return None
+
+    paths = [os.path.join(index_dir, n) for n in names]
+    paths = [p for p in paths if os.path.isdir(p)]
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    for path in paths:
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if meta.get("model") == model_name and meta.get("params") == (params or {}):
+            found = load_index(index_dir, os.path.basename(path))
+            if found is not None:
+                return found
+    return None
+
+
+def save_index(index_dir: str, key: str, embeddings, chunks, meta=None) -> None:
+    """
+    Write an artifact atomically: everything goes into a temp folder first
+    and is renamed into place, so concurrent workers never see half a file.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    final_path = os.path.join(index_dir, key)
+    if os.path.isdir(final_path):
+        return
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    meta = dict(meta or {})
+    meta.update(
+        {
+            "format": INDEX_FORMAT_VERSION,
+            "key": key,
+            "count": int(embeddings.shape[0]),
+            "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    )
+
+    tmp_path = tempfile.mkdtemp(prefix=f".{key}-", dir=index_dir)
+    try:
+        np.save(os.path.join(tmp_path, "embeddings.npy"), embeddings)
+        with open(os.path.join(tmp_path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(chunks, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, final_path)
+    except OSError as e:
+        # another worker may have won the race; theirs is just as good
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(final_path):
+            logging.warning(f"Failed to save index artifact {key}: {str(e)}")
+        return
+
+    prune_index_dir(index_dir, keep=KEEP_ARTIFACTS)
+
+
+def prune_index_dir(index_dir: str, keep: int = KEEP_ARTIFACTS) -> None:
+    """Remove all but the `keep` most recent artifacts."""
+    try:
+        entries = [
+            os.path.join(index_dir, name)
+            for name in os.listdir(index_dir)
+            if not name.startswith(".")
+        ]
+        entries = [p for p in entries if os.path.isdir(p)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for old in entries[keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+    except OSError as e:
+        logging.warning(f"Index prune failed: {str(e)}")
@@ -0,0 +1,73 @@
+# chatbot_backend/ingest.py
+"""
+Knowledge-base sources and how their text gets into chunks.
+
+Every source (university_data.txt, the rules PDF, extra.txt ...) is indexed
+as its own shard, with its own artifacts under index_cache/<name>/, so an
+edit to one file only re-embeds that file. Chunks carry the name of the
+source they came from (and the page number for PDFs), which is what
+source-filtered searches look at.
+
+PDF text is extracted page by page with `pypdf` (in requirements.txt); a
+page is chunked as soon as it has been read, so the whole document's text
+is never held at once. If pypdf is missing anyway, PDF sources are
+skipped with a warning.
+"""
+import hashlib
+import os
+
+PDF_EXTENSIONS = (".pdf",)
+
+
+class Source:
+    """One file of the knowledge base."""
+
+    def __init__(self, name: str, path: str, kind: str = None):
+        self.name = name
+        self.path = path
+        self.kind = kind or ("pdf" if path.lower().endswith(PDF_EXTENSIONS) else "text")
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.path!r})"
+
+    def stamp(self):
+        """(mtime_ns, size) of the file, or None if it does not exist."""
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def fingerprint(self) -> str:
+        """sha256 of the raw file bytes, read in blocks."""
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def iter_pdf_pages(path: str):
+    """Yield (page_number, text) for each page, 1-based, one page at a time."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, page.extract_text() or ""
+
+
+def iter_source_chunks(source: Source, chunker):
+    """
+    Chunk dicts for one source, tagged with {"source": name} and, for
+    PDFs, {"page": n}. `chunker(text)` is the Assistant's chunk_text.
+    """
+    if source.kind == "pdf":
+        for number, text in iter_pdf_pages(source.path):
+            for chunk in chunker(text):
+                yield dict(chunk, source=source.name, page=number)
+        return
+
+    with open(source.path, "r", encoding="utf-8") as f:
+        text = f.read()
+    for chunk in chunker(text):
+        yield dict(chunk, source=source.name)
@@ -0,0 +1,264 @@
+# chatbot_backend/llm_client.py
+"""
+HTTP client for the OpenAI-compatible chat completions API (Groq).
+
+- One requests.Session per process with a sized keep-alive pool, so
+  consecutive calls reuse the TCP+TLS connection to api.groq.com.
+- A circuit breaker instead of a permanent error counter: after
+  `failure_threshold` consecutive failures calls are short-circuited for
+  `recovery_timeout` seconds, then a single probe request is let through
+  (half-open). A successful probe closes the circuit again; a probe that
+  reports no outcome within `probe_timeout` seconds is given up on, so a
+  lost probe cannot keep the circuit half-open forever.
+
+The API URL is configurable, so the client can be pointed at a local stub
+server (e.g. http.server on 127.0.0.1) to exercise both paths.
+"""
+import json
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class UpstreamError(Exception):
+    """The API answered, but not with a usable completion."""
+
+
+class CircuitOpenError(Exception):
+    """Calls are being short-circuited because the upstream looks down."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        probe_timeout: float = 60.0,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        self.probes_timed_out = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = self.clock()
+            if self.state == self.OPEN and now - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if (
+                self.state == self.HALF_OPEN
+                and self._probe_in_flight
+                and now - self._probe_started >= self.probe_timeout
+            ):
+                # the probe never reported back (e.g. its caller vanished)
+                logging.warning("LLM circuit probe timed out; letting another one through")
+                self.probes_timed_out += 1
+                self._probe_in_flight = False
+
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True  # exactly one probe at a time
+                self._probe_started = now
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.warning("LLM circuit closed again after successful probe")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logging.warning(
+                        f"LLM circuit opened after {self.failures} failure(s); "
+                        f"retrying in {self.recovery_timeout:.0f}s"
+                    )
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "timesOpened": self.times_opened,
+            "shortCircuited": self.short_circuited,
+            "probesTimedOut": self.probes_timed_out,
+        }
+
+
+class ChatCompletionClient:
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        model: str,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+        breaker: CircuitBreaker = None,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.failures = 0
+
+        self.session = requests.Session()
+        # Only connection-level errors are retried (e.g. a pooled keep-alive
+        # socket the server already closed); a POST that reached the server
+        # is never replayed.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=1, connect=1, read=0, status=0, redirect=0),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+
+    def _post(self, payload, stream=False):
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("LLM circuit is open")
+
+        self.requests += 1
+        try:
+            response = self.session.post(
+                self.api_url, json=payload, timeout=self.timeout, stream=stream
+            )
+        except requests.RequestException:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code != 200:
+            body = response.text[:500]
+            response.close()
+            self.failures += 1
+            # 429 / 5xx mean the upstream is struggling; other 4xx are our bug
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise UpstreamError(f"API error {response.status_code}: {body}")
+
+        return response
+
+    def complete(self, messages, temperature: float = 0.6, max_tokens: int = 1024) -> str:
+        """Blocking chat completion; returns the assistant text."""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        response = self._post(payload)
+
+        try:
+            data = response.json()
+            reply = data["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise UpstreamError(f"Malformed API response: {str(e)}")
+
+        self.breaker.record_success()
+        return reply
+
+    def stream(self, messages, temperature: float = 0.6, max_tokens: int = 1024):
+        """
+        Streaming chat completion (stream=True). Yields text deltas as the
+        server-sent events arrive. Raises UpstreamError if the stream breaks.
+
+        The breaker always hears an outcome, also when the consumer stops
+        early (client disconnect, generator closed): the upstream answered,
+        so that counts as a success and releases a half-open probe.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        response = self._post(payload, stream=True)
+
+        recorded = False
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                delta = (event["choices"][0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            recorded = True
+            raise UpstreamError(f"Stream interrupted: {str(e)}")
+        except GeneratorExit:
+            # the consumer went away mid-stream; the upstream was fine
+            self.breaker.record_success()
+            recorded = True
+            raise
+        else:
+            self.breaker.record_success()
+            recorded = True
+        finally:
+            response.close()
+            if not recorded:
+                # anything else that ended the stream (an exception thrown
+                # into the generator, ...) must not leave a probe in flight
+                self.failures += 1
+                self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "poolSize": self.pool_size,
+            "timeout": {"connect": self.timeout[0], "read": self.timeout[1]},
+            "circuit": self.breaker.stats(),
+        }
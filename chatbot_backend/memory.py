@@ -0,0 +1,141 @@
+# chatbot_backend/memory.py
+"""
+Per-conversation chat memory for the Assistant.
+
+Each conversation (AiConversation.id, or any other hashable key such as
+"cli") keeps only its most recent turns, bounded both by count and by
+estimated tokens, so the messages prepended to a Groq call stay small no
+matter how long the process runs. Conversations nobody touched for
+`idle_ttl` seconds are dropped, and when more than `max_conversations` are
+held the least recently used one is evicted.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from chunking import estimate_tokens
+
+DEFAULT_MAX_TURNS = 6
+DEFAULT_MAX_TOKENS = 800
+DEFAULT_MAX_CONVERSATIONS = 500
+DEFAULT_IDLE_TTL = 1800
+
+
+class ConversationMemory:
+    def __init__(
+        self,
+        max_turns: int = DEFAULT_MAX_TURNS,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_conversations: int = DEFAULT_MAX_CONVERSATIONS,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        clock=time.monotonic,
+    ):
+        self.max_turns = max(1, int(max_turns))
+        self.max_tokens = max(1, int(max_tokens))
+        self.max_conversations = max(1, int(max_conversations))
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        # key -> {"turns": [(user_msg, assistant_msg, tokens), ...], "tokens", "seen"}
+        self._conversations = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._conversations)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._conversations
+
+    def _expire_idle(self, now: float) -> None:
+        # oldest entries sit at the front, so stop at the first fresh one
+        while self._conversations:
+            key, entry = next(iter(self._conversations.items()))
+            if now - entry["seen"] <= self.idle_ttl:
+                break
+            del self._conversations[key]
+            self.expirations += 1
+
+    def history(self, key) -> list:
+        """Chat messages ({"role", "content"}) for this conversation, oldest first."""
+        if key is None:
+            return []
+        with self._lock:
+            now = self.clock()
+            self._expire_idle(now)
+            entry = self._conversations.get(key)
+            if entry is None:
+                return []
+            entry["seen"] = now
+            self._conversations.move_to_end(key)
+            messages = []
+            for user_msg, assistant_msg, _ in entry["turns"]:
+                messages.append(user_msg)
+                messages.append(assistant_msg)
+            return messages
+
+    def append(self, key, question: str, reply: str) -> None:
+        """Remember one exchange; older turns fall off to stay within bounds."""
+        if key is None:
+            return
+        tokens = estimate_tokens(question) + estimate_tokens(reply)
+        with self._lock:
+            now = self.clock()
+            self._expire_idle(now)
+            entry = self._conversations.get(key)
+            if entry is None:
+                entry = self._conversations[key] = {"turns": [], "tokens": 0, "seen": now}
+            entry["turns"].append(
+                (
+                    {"role": "user", "content": question},
+                    {"role": "assistant", "content": reply},
+                    tokens,
+                )
+            )
+            entry["tokens"] += tokens
+            entry["seen"] = now
+            self._conversations.move_to_end(key)
+
+            # always keep the newest turn, even if it alone is over budget
+            while len(entry["turns"]) > 1 and (
+                len(entry["turns"]) > self.max_turns or entry["tokens"] > self.max_tokens
+            ):
+                entry["tokens"] -= entry["turns"].pop(0)[2]
+
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+                self.evictions += 1
+
+    def seed(self, key, turns) -> None:
+        """
+        Load (question, reply) pairs for a conversation that is not in
+        memory yet, e.g. from the DB after a restart or an eviction.
+        """
+        if key is None or key in self:
+            return
+        for question, reply in turns:
+            self.append(key, question, reply)
+
+    def forget(self, key) -> None:
+        """Drop a conversation, e.g. after its messages were deleted."""
+        with self._lock:
+            self._conversations.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._conversations.values())
+            turns = sum(len(e["turns"]) for e in entries)
+            chars = sum(
+                len(u["content"]) + len(a["content"]) for e in entries for u, a, _ in e["turns"]
+            )
+        return {
+            "conversations": len(entries),
+            "maxConversations": self.max_conversations,
+            "turns": turns,
+            "estimatedTokens": sum(e["tokens"] for e in entries),
+            "textChars": chars,
+            "limits": {"turns": self.max_turns, "tokens": self.max_tokens, "idleTtl": self.idle_ttl},
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
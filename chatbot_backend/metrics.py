@@ -0,0 +1,78 @@
+# chatbot_backend/metrics.py
+"""
+Tiny in-process metrics used by /api/metrics.
+"""
+import threading
+from collections import deque
+
+
+class LatencyRecorder:
+    """Keeps the last `window` samples (ms) and reports count/avg/percentiles."""
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, value_ms: float) -> None:
+        with self._lock:
+            self.samples.append(value_ms)
+            self.count += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            values = sorted(self.samples)
+        if not values:
+            return {"count": self.count, "avgMs": None, "p50Ms": None, "p95Ms": None}
+
+        def pct(p):
+            return round(values[min(len(values) - 1, int(p * len(values)))], 1)
+
+        return {
+            "count": self.count,
+            "avgMs": round(sum(values) / len(values), 1),
+            "p50Ms": pct(0.50),
+            "p95Ms": pct(0.95),
+        }
+
+
+class Histogram:
+    """Counts of observed values per upper bucket bound (plus an overflow bucket)."""
+
+    def __init__(self, bounds):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value) -> None:
+        with self._lock:
+            i = next((i for i, b in enumerate(self.bounds) if value <= b), len(self.bounds))
+            self.counts[i] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+            return {
+                "count": self.count,
+                "mean": round(self.total / self.count, 2) if self.count else None,
+                "max": self.max,
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class Counter:
+    """A thread-safe event counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
@@ -0,0 +1,480 @@
+# chatbot_backend/migrations.py
+"""
+Versioned schema migrations for the backend database.
+
+db.create_all() only creates missing tables; it never adds a column or an
+index to a table that already exists. Every schema change is therefore a
+numbered step in MIGRATIONS, applied once per database and recorded in
+the schema_migrations table. Steps check what is already there, so the
+same list upgrades an old users.db and a fresh one. Each step spells out
+the tables and columns it touches as they were at its version, so it
+does not change meaning when models.py does.
+
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # list applied / pending steps
+    python migrations.py explain    # EXPLAIN QUERY PLAN of the hot queries
+
+`explain` exits non-zero when a hot query scans a whole table or sorts
+without an index; tests/test_migrations.py runs the same check.
+
+To change the schema, append (next number, description, function) to
+MIGRATIONS. Never edit or renumber a step that has shipped.
+"""
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    column,
+    func,
+    inspect,
+    select,
+    table,
+    text,
+)
+
+from models import (
+    db,
+    User,
+    ChatThread,
+    ChatMessage,
+    AiConversation,
+    AiMessage,
+    DailyHistory,
+    day_bounds,
+)
+from pagination import older_than
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# -------------------------------------------------
+# HELPERS FOR MIGRATION STEPS
+# -------------------------------------------------
+# Steps describe tables with plain SQLAlchemy Core, as they were at that
+# version, never with the models: a model changes with the next step,
+# and an old step must keep doing exactly what it did when it shipped.
+def add_columns(table_name: str, columns: dict) -> None:
+    """ALTER TABLE ... ADD COLUMN for each missing column (name -> SQL type)."""
+    conn = db.session.connection()
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    for name, sql_type in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {sql_type}"))
+
+
+def create_index(name: str, table_name: str, *columns) -> None:
+    conn = db.session.connection()
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({', '.join(columns)})"))
+
+
+def drop_indexes(*names) -> None:
+    conn = db.session.connection()
+    for name in names:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+# -------------------------------------------------
+# MIGRATIONS
+# -------------------------------------------------
+def create_tables():
+    """The schema as it was before migrations existed."""
+    meta = MetaData()
+    Table(
+        "users",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("full_name", String(120), nullable=False),
+        Column("email", String(120), unique=True, nullable=False, index=True),
+        Column("password_hash", String(255), nullable=False),
+        Column("role", String(50), nullable=False),
+        Column("is_approved", Boolean),
+        Column("is_blocked", Boolean),
+        Column("department", String(120)),
+        Column("semester", String(50)),
+        Column("cnic", String(50)),
+        Column("contact", String(50)),
+        Column("position_post", String(120)),
+        Column("student_id", String(50)),
+        Column("employee_id", String(50)),
+        Column("profile_image_path", String(255)),
+        Column("student_card_image_path", String(255)),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "revoked_tokens",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("jti", String(36), unique=True, index=True, nullable=False),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "chat_threads",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("consultant_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("created_at", DateTime),
+    )
+    Table(
+        "chat_messages",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("thread_id", Integer, ForeignKey("chat_threads.id"), nullable=False, index=True),
+        Column("sender_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("text", Text, nullable=False),
+        Column("created_at", DateTime, index=True),
+    )
+    Table(
+        "ai_conversations",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+        Column("title", String(255)),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "ai_messages",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column(
+            "conversation_id", Integer, ForeignKey("ai_conversations.id"), nullable=False, index=True
+        ),
+        Column("sender", String(16), nullable=False),
+        Column("text", Text, nullable=False),
+        Column("created_at", DateTime, index=True),
+    )
+    meta.create_all(bind=db.session.connection())
+
+
+def add_conversation_summary():
+    add_columns("ai_conversations", {"summary": "TEXT", "summary_upto_id": "INTEGER"})
+
+
+def add_conversation_last_message():
+    add_columns(
+        "ai_conversations",
+        {
+            "last_message_id": "INTEGER",
+            "last_snippet": "VARCHAR(120)",
+            "message_count": "INTEGER",
+        },
+    )
+    create_index("ix_ai_conversations_user_updated", "ai_conversations", "user_id", "updated_at")
+
+    # backfill the new columns of existing conversations
+    conversations = table(
+        "ai_conversations",
+        column("id"),
+        column("last_message_id"),
+        column("last_snippet"),
+        column("message_count"),
+    )
+    messages = table("ai_messages", column("id"), column("conversation_id"), column("text"))
+    latest = messages.alias("latest")
+    last_id = (
+        select(func.max(messages.c.id))
+        .where(messages.c.conversation_id == conversations.c.id)
+        .correlate(conversations)  # also when nested in the snippet subquery
+        .scalar_subquery()
+    )
+    db.session.connection().execute(
+        conversations.update()
+        .where(conversations.c.message_count.is_(None))
+        .values(
+            message_count=select(func.count(messages.c.id))
+            .where(messages.c.conversation_id == conversations.c.id)
+            .scalar_subquery(),
+            last_message_id=last_id,
+            last_snippet=select(func.substr(latest.c.text, 1, 120))
+            .where(latest.c.id == last_id)
+            .scalar_subquery(),
+        )
+    )
+
+
+def fill_daily_history():
+    meta = MetaData()
+    Table("users", meta, Column("id", Integer, primary_key=True))
+    daily = Table(
+        "daily_history",
+        meta,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("day", Date, nullable=False),
+        Column("message_count", Integer, nullable=False),
+        Column("first_at", DateTime),
+        Column("last_at", DateTime),
+        Column("snippet", String(120)),
+        UniqueConstraint("user_id", "day", name="uq_daily_history_user_day"),
+    )
+    conn = db.session.connection()
+    daily.create(conn, checkfirst=True)
+    if conn.execute(select(daily.c.id).limit(1)).first() is not None:
+        return
+
+    conversations = table("ai_conversations", column("id"), column("user_id"))
+    messages = table(
+        "ai_messages",
+        column("id"),
+        column("conversation_id"),
+        column("sender"),
+        column("text"),
+        column("created_at", DateTime),
+    )
+    rows = {}
+    for user_id, created_at, sender, text_ in conn.execute(
+        select(conversations.c.user_id, messages.c.created_at, messages.c.sender, messages.c.text)
+        .join(conversations, conversations.c.id == messages.c.conversation_id)
+        .where(messages.c.created_at.isnot(None))
+        .order_by(messages.c.created_at.asc(), messages.c.id.asc())
+    ):
+        key = (user_id, created_at.date())
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = dict(
+                user_id=user_id, day=key[1], message_count=0, first_at=created_at, snippet=None
+            )
+        row["message_count"] += 1
+        row["last_at"] = created_at
+        if row["snippet"] is None and sender == "user":
+            row["snippet"] = (text_ or "")[:120]
+    if rows:
+        conn.execute(daily.insert(), list(rows.values()))
+
+
+def add_hot_path_indexes():
+    create_index("ix_users_created_at", "users", "created_at")
+    create_index("ix_users_role_created", "users", "role", "created_at")
+    create_index("ix_users_student_id", "users", "student_id")
+    create_index("ix_users_employee_id", "users", "employee_id")
+    create_index("ix_chat_threads_student_consultant", "chat_threads", "student_id", "consultant_id")
+    create_index("ix_chat_threads_consultant_created", "chat_threads", "consultant_id", "created_at")
+    create_index("ix_chat_messages_thread_created", "chat_messages", "thread_id", "created_at", "id")
+    create_index(
+        "ix_ai_messages_conversation_created", "ai_messages", "conversation_id", "created_at", "id"
+    )
+    # single-column indexes that are now the prefix of a composite one
+    drop_indexes(
+        "ix_ai_conversations_user_id",
+        "ix_ai_messages_conversation_id",
+        "ix_chat_messages_thread_id",
+    )
+
+
+MIGRATIONS = [
+    (1, "create tables", create_tables),
+    (2, "ai_conversations rolling summary columns", add_conversation_summary),
+    (3, "ai_conversations last-message columns + backfill", add_conversation_last_message),
+    (4, "daily_history table + backfill", fill_daily_history),
+    (5, "composite indexes for the hot query paths", add_hot_path_indexes),
+]
+
+
+def applied_versions() -> set:
+    schema_migrations.create(db.engine, checkfirst=True)
+    return set(db.session.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade() -> list:
+    """Apply pending migrations in order, one transaction each. Returns their names."""
+    done = applied_versions()
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            step()
+            db.session.execute(
+                schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append(f"{version:04d} {name}")
+    return applied
+
+
+# -------------------------------------------------
+# QUERY PLAN CHECK
+# -------------------------------------------------
+def hot_queries():
+    """
+    (name, statement, allow_sort) for the queries behind the busiest
+    endpoints, built the same way the endpoints build them. allow_sort
+    marks queries that merge several index ranges and must sort.
+    """
+    now = datetime.utcnow()
+    day_start, day_end = day_bounds(now.date())
+    cursor = (now, 1)
+    user_day = (
+        db.session.query(AiMessage)
+        .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
+        .filter(
+            AiConversation.user_id == 1,
+            AiMessage.created_at >= day_start,
+            AiMessage.created_at < day_end,
+        )
+    )
+    return [
+        (
+            "conversation list",
+            AiConversation.query.filter(
+                AiConversation.user_id == 1,
+                AiConversation.created_at >= now - timedelta(days=365),
+            ).order_by(AiConversation.updated_at.desc()),
+            False,
+        ),
+        (
+            "conversation messages page",
+            AiMessage.query.filter_by(conversation_id=1)
+            .filter(older_than(AiMessage.created_at, AiMessage.id, cursor))
+            .order_by(AiMessage.created_at.desc(), AiMessage.id.desc())
+            .limit(51),
+            False,
+        ),
+        (
+            "recent turns",
+            AiMessage.query.filter_by(conversation_id=1)
+            .order_by(AiMessage.created_at.desc(), AiMessage.id.desc())
+            .limit(4),
+            False,
+        ),
+        (
+            "history dates",
+            DailyHistory.query.filter(
+                DailyHistory.user_id == 1,
+                DailyHistory.day >= (now - timedelta(days=365)).date(),
+            ).order_by(DailyHistory.day.desc()),
+            False,
+        ),
+        (
+            "history for date page",
+            user_day.filter(AiMessage.sender == "user")
+            .order_by(AiMessage.created_at.desc(), AiMessage.id.desc())
+            .limit(51),
+            True,
+        ),
+        (
+            "daily history rebuild",
+            user_day.with_entities(
+                db.func.count(AiMessage.id),
+                db.func.min(AiMessage.created_at),
+                db.func.max(AiMessage.created_at),
+            ),
+            False,
+        ),
+        (
+            "thread messages page",
+            ChatMessage.query.filter_by(thread_id=1)
+            .filter(older_than(ChatMessage.created_at, ChatMessage.id, cursor))
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(51),
+            False,
+        ),
+        (
+            "thread for student/consultant",
+            ChatThread.query.filter_by(student_id=1, consultant_id=2).limit(1),
+            False,
+        ),
+        (
+            "consultant threads",
+            ChatThread.query.filter_by(consultant_id=2).order_by(ChatThread.created_at.desc()),
+            False,
+        ),
+        ("student id taken", User.query.filter_by(student_id="FA21-001").limit(1), False),
+        ("employee id taken", User.query.filter_by(employee_id="EMP-001").limit(1), False),
+        (
+            "user list page",
+            User.query.order_by(User.created_at.desc(), User.id.desc()).limit(51),
+            False,
+        ),
+        (
+            "student list page",
+            User.query.filter_by(role="STUDENT")
+            .order_by(User.created_at.desc(), User.id.desc())
+            .limit(51),
+            False,
+        ),
+    ]
+
+
+def _driver_value(value):
+    # the plan does not depend on the values; sqlite3 wants plain types
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def explain_hot_queries() -> list:
+    """
+    [(name, plan_lines, problems)] from SQLite's EXPLAIN QUERY PLAN. A full
+    table SCAN is always a problem; a temp B-tree sort is one unless the
+    query is marked allow_sort.
+    """
+    if db.engine.dialect.name != "sqlite":
+        raise RuntimeError("explain_hot_queries() reads SQLite query plans")
+
+    results = []
+    conn = db.session.connection()
+    for name, query, allow_sort in hot_queries():
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        params = tuple(_driver_value(compiled.params[key]) for key in compiled.positiontup)
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        plan = [row[-1] for row in rows]
+
+        problems = [
+            line
+            for line in plan
+            if (line.startswith("SCAN ") and " USING " not in line)
+            or ("TEMP B-TREE" in line and not allow_sort)
+        ]
+        results.append((name, plan, problems))
+    return results
+
+
+if __name__ == "__main__":
+    import os
+
+    # the CLI only needs the database, not the chatbot model
+    os.environ.setdefault("CHATBOT_WARMUP", "0")
+    from app import app  # importing the app applies pending migrations
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    with app.app_context():
+        if command == "upgrade":
+            print("\n".join(upgrade()) or "Database is up to date")
+        elif command == "status":
+            done = applied_versions()
+            for version, name, _ in MIGRATIONS:
+                print(f"{'applied' if version in done else 'pending':8} {version:04d} {name}")
+        elif command == "explain":
+            failed = 0
+            for name, plan, problems in explain_hot_queries():
+                print(f"{'FAIL' if problems else 'ok  '} {name}")
+                for line in plan:
+                    print(f"       {line}")
+                failed += bool(problems)
+            sys.exit(1 if failed else 0)
+        else:
+            print("usage: python migrations.py [upgrade|status|explain]")
+            sys.exit(2)
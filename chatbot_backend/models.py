@@ -1,12 +1,22 @@
 # chatbot_backend/models.py
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
 
+# length of the message previews shown in the history sidebar
+SNIPPET_CHARS = 120
+
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        # student organizer's user list: one role, newest first
+        db.Index("ix_users_role_created", "role", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(120), nullable=False)
@@ -31,8 +41,9 @@ class User(db.Model):
 
     # employment / identity
     position_post = db.Column(db.String(120), nullable=True)
-    student_id = db.Column(db.String(50), nullable=True)
-    employee_id = db.Column(db.String(50), nullable=True)
+    # looked up on registration to reject duplicates
+    student_id = db.Column(db.String(50), nullable=True, index=True)
+    employee_id = db.Column(db.String(50), nullable=True, index=True)
 
     # store file paths (not raw image bytes)
     profile_image_path = db.Column(
@@ -42,7 +53,7 @@ class User(db.Model):
         db.String(255), nullable=True
     )  # student card snapshot
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
@@ -92,6 +103,10 @@ class ChatThread(db.Model):
     """
 
     __tablename__ = "chat_threads"
+    __table_args__ = (
+        db.Index("ix_chat_threads_student_consultant", "student_id", "consultant_id"),
+        db.Index("ix_chat_threads_consultant_created", "consultant_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -136,10 +151,14 @@ class ChatThread(db.Model):
 
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # a thread's transcript in keyset order
+        db.Index("ix_chat_messages_thread_created", "thread_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     thread_id = db.Column(
-        db.Integer, db.ForeignKey("chat_threads.id"), nullable=False, index=True
+        db.Integer, db.ForeignKey("chat_threads.id"), nullable=False
     )
     sender_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     text = db.Column(db.Text, nullable=False)
@@ -165,15 +184,30 @@ class ChatMessage(db.Model):
 
 class AiConversation(db.Model):
     __tablename__ = "ai_conversations"
+    __table_args__ = (
+        # sidebar: a user's conversations, most recently active first
+        db.Index("ix_ai_conversations_user_updated", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     title = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    # rolling summary of everything up to (and including) AiMessage
+    # summary_upto_id; newer messages are sent to the model verbatim
+    summary = db.Column(db.Text, nullable=True)
+    summary_upto_id = db.Column(db.Integer, nullable=True)
+
+    # denormalized from ai_messages so the sidebar needs no per-row query;
+    # inserts update them below, deletes via sync_conversation_stats (app.py)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_snippet = db.Column(db.String(SNIPPET_CHARS), nullable=True)
+    message_count = db.Column(db.Integer, nullable=True, default=0)
+
     user = db.relationship("User")
     messages = db.relationship(
         "AiMessage",
@@ -186,10 +220,15 @@ class AiConversation(db.Model):
 
 class AiMessage(db.Model):
     __tablename__ = "ai_messages"
+    __table_args__ = (
+        # a conversation's messages in keyset order, and per-user day ranges
+        # (ai_conversations by user_id, then a created_at range per conversation)
+        db.Index("ix_ai_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(
-        db.Integer, db.ForeignKey("ai_conversations.id"), nullable=False, index=True
+        db.Integer, db.ForeignKey("ai_conversations.id"), nullable=False
     )
     sender = db.Column(db.String(16), nullable=False)  # "user" or "ai"
     text = db.Column(db.Text, nullable=False)
@@ -203,3 +242,179 @@ class AiMessage(db.Model):
             "text": self.text,
             "createdAt": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class DailyHistory(db.Model):
+    """
+    Per-user, per-day rollup of AI messages behind /api/ai/history/dates.
+    Days are UTC dates of AiMessage.created_at.
+    """
+
+    __tablename__ = "daily_history"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "day", name="uq_daily_history_user_day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=True)
+    last_at = db.Column(db.DateTime, nullable=True)
+    # first user message of the day, cut to SNIPPET_CHARS
+    snippet = db.Column(db.String(SNIPPET_CHARS), nullable=True)
+
+    def to_dict(self):
+        return {
+            "date": self.day.isoformat(),
+            "count": self.message_count,
+            "firstAt": self.first_at.isoformat() if self.first_at else None,
+            "lastAt": self.last_at.isoformat() if self.last_at else None,
+            "snippet": (self.snippet + "…") if self.snippet else "",
+        }
+
+
+@event.listens_for(AiMessage, "after_insert")
+def track_last_ai_message(mapper, connection, message):
+    """
+    Point the conversation at its newest message, in the same flush (and
+    transaction) as the INSERT. The count is incremented in SQL so
+    concurrent requests do not lose updates; updated_at is left alone.
+    """
+    conversations = AiConversation.__table__
+    connection.execute(
+        conversations.update()
+        .where(conversations.c.id == message.conversation_id)
+        .values(
+            last_message_id=message.id,
+            last_snippet=(message.text or "")[:SNIPPET_CHARS],
+            message_count=func.coalesce(conversations.c.message_count, 0) + 1,
+            updated_at=conversations.c.updated_at,
+        )
+    )
+
+
+@event.listens_for(AiMessage, "after_insert")
+def roll_up_ai_message(mapper, connection, message):
+    """
+    Count the message into its user's DailyHistory row with one upsert.
+    Deletes rebuild the affected days instead (rebuild_daily_history).
+    """
+    if message.created_at is None:
+        return
+    insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    rollups = DailyHistory.__table__
+    owner = (
+        db.select(AiConversation.user_id)
+        .where(AiConversation.id == message.conversation_id)
+        .scalar_subquery()
+    )
+    stmt = insert(rollups).values(
+        user_id=owner,
+        day=message.created_at.date(),
+        message_count=1,
+        first_at=message.created_at,
+        last_at=message.created_at,
+        snippet=(message.text or "")[:SNIPPET_CHARS] if message.sender == "user" else None,
+    )
+    new = stmt.excluded
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={
+                "message_count": rollups.c.message_count + 1,
+                "first_at": case(
+                    (new.first_at < rollups.c.first_at, new.first_at), else_=rollups.c.first_at
+                ),
+                "last_at": case(
+                    (new.last_at > rollups.c.last_at, new.last_at), else_=rollups.c.last_at
+                ),
+                "snippet": func.coalesce(rollups.c.snippet, new.snippet),
+            },
+        )
+    )
+
+
+# ==============================
+#   HISTORY ROLLUP MAINTENANCE (deletes)
+# ==============================
+
+
+def sync_conversation_stats(*criteria) -> int:
+    """
+    Recompute AiConversation.last_message_id / last_snippet / message_count
+    from ai_messages for the conversations matching `criteria`, in one
+    UPDATE with correlated subqueries (not committed). Used after
+    deletes; inserts are tracked by the after_insert hooks above.
+    """
+    last_id = (
+        select(func.max(AiMessage.id))
+        .where(AiMessage.conversation_id == AiConversation.id)
+        .correlate(AiConversation)  # also when nested in the snippet subquery
+        .scalar_subquery()
+    )
+    latest = aliased(AiMessage)
+    return AiConversation.query.filter(*criteria).update(
+        {
+            "message_count": select(func.count(AiMessage.id))
+            .where(AiMessage.conversation_id == AiConversation.id)
+            .scalar_subquery(),
+            "last_message_id": last_id,
+            "last_snippet": select(func.substr(latest.text, 1, SNIPPET_CHARS))
+            .where(latest.id == last_id)
+            .scalar_subquery(),
+            # keep the sidebar order (updated_at) as it was
+            "updated_at": AiConversation.updated_at,
+        },
+        synchronize_session=False,
+    )
+
+
+def day_bounds(day):
+    """[start, end) datetimes of a UTC day, for sargable created_at filters."""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def rebuild_daily_history(user_id: int, days) -> None:
+    """
+    Recompute one user's DailyHistory rows for `days` from ai_messages, e.g.
+    after deletes (not committed). Days left without messages are dropped.
+    """
+    for day in set(days):
+        start, end = day_bounds(day)
+        in_day = (
+            AiConversation.user_id == user_id,
+            AiMessage.created_at >= start,
+            AiMessage.created_at < end,
+        )
+        count, first_at, last_at = (
+            db.session.query(
+                func.count(AiMessage.id),
+                func.min(AiMessage.created_at),
+                func.max(AiMessage.created_at),
+            )
+            .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
+            .filter(*in_day)
+            .one()
+        )
+        row = DailyHistory.query.filter_by(user_id=user_id, day=day).first()
+        if not count:
+            if row is not None:
+                db.session.delete(row)
+            continue
+
+        first_prompt = (
+            db.session.query(AiMessage.text)
+            .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
+            .filter(*in_day, AiMessage.sender == "user")
+            .order_by(AiMessage.created_at.asc(), AiMessage.id.asc())
+            .first()
+        )
+        if row is None:
+            row = DailyHistory(user_id=user_id, day=day)
+            db.session.add(row)
+        row.message_count = count
+        row.first_at = first_at
+        row.last_at = last_at
+        row.snippet = first_prompt.text[:SNIPPET_CHARS] if first_prompt else None
@@ -0,0 +1,111 @@
+# chatbot_backend/pagination.py
+"""
+Keyset (cursor) pagination on (created_at, id) for the history endpoints.
+
+A page request carries at most one of `before` / `after` (opaque cursor
+tokens) and a `limit` that is clamped to the server-side maximum:
+
+    ?limit=50                  newest page
+    ?before=<token>&limit=50   the page just older than <token>
+    ?after=<token>&limit=50    the page just newer than <token>
+
+Rows are always returned in the endpoint's display order. The response
+carries `page = {"limit", "hasMore", "before", "after"}`: `before` and
+`after` are the tokens of the oldest and newest row on the page, and
+`hasMore` says whether the direction that was scanned (older, unless
+`after` was given) has more rows. Polling with `after` picks up rows
+added since. Paging never uses OFFSET, so every page costs one index
+range scan, however deep it is.
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageRequest:
+    def __init__(self, limit: int, before=None, after=None):
+        self.limit = limit
+        self.before = before  # (created_at, id) or None
+        self.after = after
+
+    @classmethod
+    def from_args(cls, args, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE):
+        """Parse `limit`, `before`, `after` query args; ValueError if malformed."""
+        try:
+            limit = int(args.get("limit", default))
+        except (TypeError, ValueError):
+            raise ValueError("limit must be an integer") from None
+        limit = max(1, min(limit, maximum))
+
+        before, after = args.get("before"), args.get("after")
+        if before and after:
+            raise ValueError("Use either 'before' or 'after', not both")
+        return cls(
+            limit,
+            before=decode_cursor(before) if before else None,
+            after=decode_cursor(after) if after else None,
+        )
+
+
+def encode_cursor(created_at, row_id) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str):
+    """Token -> (created_at, id); ValueError for anything that is not ours."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        stamp, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(stamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def newer_than(created_col, id_col, key):
+    """Rows after `key` = (created_at, id) in (created_at, id) order."""
+    created_at, row_id = key
+    return or_(created_col > created_at, and_(created_col == created_at, id_col > row_id))
+
+
+def older_than(created_col, id_col, key):
+    created_at, row_id = key
+    return or_(created_col < created_at, and_(created_col == created_at, id_col < row_id))
+
+
+def keyset_page(query, created_col, id_col, page: PageRequest, newest_first: bool = False):
+    """
+    Apply `page` to `query` and run it. Returns (rows, page_info).
+
+    `newest_first` is the display order (True for user lists, False for
+    chat transcripts, which read top to bottom in time).
+    """
+    ascending = page.after is not None
+    if ascending:
+        query = query.filter(newer_than(created_col, id_col, page.after))
+        query = query.order_by(created_col.asc(), id_col.asc())
+    else:
+        if page.before is not None:
+            query = query.filter(older_than(created_col, id_col, page.before))
+        query = query.order_by(created_col.desc(), id_col.desc())
+
+    # one extra row tells whether there is another page in this direction
+    rows = query.limit(page.limit + 1).all()
+    has_more = len(rows) > page.limit
+    rows = rows[: page.limit]
+    if not ascending:
+        rows.reverse()  # oldest first from here on
+
+    info = {
+        "limit": page.limit,
+        "hasMore": has_more,
+        "before": encode_cursor(rows[0].created_at, rows[0].id) if rows else None,
+        "after": encode_cursor(rows[-1].created_at, rows[-1].id) if rows else None,
+    }
+    if newest_first:
+        rows.reverse()
+    return rows, info
@@ -0,0 +1,319 @@
+# chatbot_backend/retrieval.py
+"""
+Retrieval helpers used by the Assistant.
+
+The knowledge base is a few hundred chunks, so brute force is the right
+algorithm – we just keep the per-query overhead down: embeddings are
+L2-normalized once into a contiguous float32 matrix per source (stored
+that way, so a warm start searches the memory-mapped file directly),
+cosine similarity is a matrix product and top-k uses argpartition
+instead of a full sort.
+
+Exact terms (course codes, "CGPA", "HoD", rule letters) are served by a
+small BM25 inverted index; dense and lexical rankings are merged with
+reciprocal rank fusion. An optional maximal-marginal-relevance pass
+drops near-duplicate chunks (the corpus restates some rules in several
+sections) before they eat the context budget.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from has have how i if in is it
+    its me my of on or should the their there this to was what when where
+    which who why will with you your
+    """.split()
+)
+
+
+def tokenize(text: str):
+    """Lower-cased word tokens without stopwords ('CS-101', 'HoD' survive)."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+_EXACT_TOKEN_RE = re.compile(r"\d|\w[-/]\w|[A-Z]\w*[A-Z]")
+
+
+def is_exact_token(word: str) -> bool:
+    """Codes and acronyms ('CS-101', 'CGPA', 'HoD') that BM25 matches best."""
+    return bool(_EXACT_TOKEN_RE.search(word))
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """Return a float32 copy of `matrix` with unit-length rows."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    Exact cosine top-k over pre-normalized float32 matrices. An index over
+    several shards (concat) keeps one matrix per shard and scores each in
+    place, so memory-mapped shards are never copied into one big array.
+    """
+
+    def __init__(self, embeddings, normalized: bool = False):
+        """`normalized`: rows are unit length already, use them as they are (no copy)."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        self.parts = [matrix if normalized else normalize_rows(matrix)]
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._size = self.parts[0].shape[0]
+
+    @classmethod
+    def concat(cls, indexes):
+        """One index over `indexes`, rows numbered in that order, sharing their matrices."""
+        index = cls.__new__(cls)
+        index.parts = [m for i in indexes for m in i.parts]
+        sizes = [m.shape[0] for m in index.parts]
+        index._starts = np.cumsum([0] + sizes[:-1], dtype=np.int64)
+        index._size = sum(sizes)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, ids):
+        """Unit-length rows by index: one id gives a vector, a list of ids a matrix."""
+        if len(self.parts) == 1:
+            return self.parts[0][ids]
+        ids = np.asarray(ids)
+        part = np.searchsorted(self._starts, ids, side="right") - 1
+        if ids.ndim == 0:
+            return self.parts[part][ids - self._starts[part]]
+        rows = np.empty((len(ids), self.parts[0].shape[1]), dtype=np.float32)
+        for p in np.unique(part):
+            mask = part == p
+            rows[mask] = self.parts[p][ids[mask] - self._starts[p]]
+        return rows
+
+    def scores(self, query_vecs) -> np.ndarray:
+        """Cosine similarity of each query (rows) against every chunk."""
+        queries = normalize_rows(query_vecs)
+        if len(self.parts) == 1:
+            return queries @ self.parts[0].T
+        return np.hstack([queries @ m.T for m in self.parts])
+
+    def search(self, query_vecs, top_k=3, min_score=None):
+        """
+        Top-k search for one or many queries.
+
+        Returns one list per query of (chunk_index, score) tuples, best
+        first. Hits scoring below `min_score` are dropped, so an empty list
+        means nothing relevant was found for that query.
+        """
+        n = len(self)
+        k = min(top_k, n)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(np.atleast_2d(query_vecs).shape[0])]
+
+        scores = self.scores(query_vecs)
+
+        if k < n:
+            top_idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top_idx = np.broadcast_to(np.arange(n), scores.shape)
+        top_scores = np.take_along_axis(scores, top_idx, axis=1)
+
+        order = np.argsort(-top_scores, axis=1)
+        top_idx = np.take_along_axis(top_idx, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for row_idx, row_scores in zip(top_idx, top_scores):
+            results.append(
+                [
+                    (int(i), float(s))
+                    for i, s in zip(row_idx, row_scores)
+                    if min_score is None or s >= min_score
+                ]
+            )
+        return results
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index (term -> [(doc, tf), ...])."""
+
+    def __init__(self, texts, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_len = np.zeros(len(texts), dtype=np.float32)
+        self.doc_terms = []
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_len[doc_id] = sum(counts.values())
+            self.doc_terms.append(frozenset(counts))
+            for term, tf in counts.items():
+                self.postings[term].append((doc_id, tf))
+
+        n = len(texts)
+        self.avgdl = float(self.doc_len.mean()) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def search(self, query: str, top_k=3):
+        """Return [(doc_index, score), ...] best first; only docs sharing a term."""
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / self.avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [(int(i), float(sc)) for i, sc in best]
+
+    def coverage(self, query: str, doc_id: int) -> float:
+        """Share of the query terms that occur in the given document."""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        return len(terms & self.doc_terms[doc_id]) / len(terms)
+
+    def covers(self, query: str, doc_id: int) -> bool:
+        """True if every query term occurs in the given document."""
+        return self.coverage(query, doc_id) == 1.0
+
+
+def reciprocal_rank_fusion(rankings, top_k=3, k: int = 60):
+    """
+    Merge several ranked hit lists [(doc_index, score), ...] into one.
+    Each list contributes 1 / (k + rank); raw scores are ignored, so cosine
+    and BM25 values never need to be put on the same scale.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+    return [(int(i), float(sc)) for i, sc in best]
+
+
+def mmr_rerank(candidates, vectors, top_k=3, lambda_: float = 0.7):
+    """
+    Maximal marginal relevance over a ranked candidate list.
+
+    candidates : [(doc_index, score), ...] best first (cosine, RRF or BM25)
+    vectors    : unit-length embedding rows of the whole index (a matrix
+                 or a VectorIndex)
+
+    Each step picks the candidate maximizing
+        lambda_ * relevance - (1 - lambda_) * max cosine to the picks so far
+    where relevance is the candidate's score divided by the best score, so
+    any scorer works. lambda_=1 keeps the original order.
+    """
+    if len(candidates) <= 1 or top_k <= 1:
+        return list(candidates[:top_k])
+
+    ids = [i for i, _ in candidates]
+    scores = np.array([s for _, s in candidates], dtype=np.float32)
+    best = scores.max()
+    relevance = scores / best if best > 0 else np.ones_like(scores)
+
+    cand = vectors[ids]
+    similarity = cand @ cand.T
+
+    selected = [0]
+    max_sim = similarity[0].copy()
+    remaining = np.ones(len(ids), dtype=bool)
+    remaining[0] = False
+    while len(selected) < min(top_k, len(ids)):
+        gain = lambda_ * relevance - (1 - lambda_) * max_sim
+        gain[~remaining] = -np.inf
+        pick = int(np.argmax(gain))
+        selected.append(pick)
+        remaining[pick] = False
+        max_sim = np.maximum(max_sim, similarity[pick])
+
+    return [candidates[j] for j in selected]
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash of one chunk, used to diff old and new indexes."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class KnowledgeIndex:
+    """
+    Everything a search reads, bundled into one object that is never
+    mutated after construction. A reload builds a new KnowledgeIndex and
+    swaps the reference, so in-flight searches keep using the old one.
+    """
+
+    def __init__(self, chunks, embeddings, index_hash=None, normalized=False):
+        """
+        `embeddings` has one row per chunk: a matrix (unit-length rows if
+        `normalized`), or the VectorIndex merge() builds over the shards.
+        """
+        self.chunks = list(chunks)  # {"text", "section", "line", "source"} dicts
+        self.chunk_texts = [c["text"] for c in self.chunks]
+        self.chunk_hashes = [chunk_hash(t) for t in self.chunk_texts]
+        self.embeddings = embeddings
+        self.index_hash = index_hash
+        if isinstance(embeddings, VectorIndex):
+            self.vectors = embeddings
+        else:
+            self.vectors = VectorIndex(embeddings, normalized) if len(self.chunks) else None
+        self.lexical = BM25Index(self.chunk_texts)
+        self.shards = {}  # source name -> KnowledgeIndex (set by merge)
+        self._subsets = {}
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def rows_by_hash(self) -> dict:
+        """chunk hash -> row in the embedding matrix."""
+        return {h: i for i, h in enumerate(self.chunk_hashes)}
+
+    @classmethod
+    def merge(cls, shards):
+        """
+        One searchable index over several per-source shards
+        ({name: KnowledgeIndex}). Its hash changes whenever a shard's does.
+        The shards' matrices are searched where they are (memory-mapped on
+        a warm start), not stacked into a copy.
+        """
+        names = sorted(n for n, shard in shards.items() if len(shard))
+        if not names:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+
+        chunks = [c for n in names for c in shards[n].chunks]
+        vectors = VectorIndex.concat([shards[n].vectors for n in names])
+        raw = "|".join(f"{n}:{shards[n].index_hash}" for n in names)
+        merged = cls(chunks, vectors, hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24])
+        merged.shards = {n: shards[n] for n in names}
+        return merged
+
+    def subset(self, sources):
+        """Index over only the given source names (shared, built once per set)."""
+        names = tuple(sorted(set(sources) & set(self.shards)))
+        if len(names) == len(self.shards) and names:
+            return self
+        if len(names) == 1:
+            return self.shards[names[0]]
+        if names not in self._subsets:
+            self._subsets[names] = KnowledgeIndex.merge({n: self.shards[n] for n in names})
+        return self._subsets[names]
+
+
+EMPTY_INDEX = KnowledgeIndex([], np.zeros((0, 0), dtype=np.float32))
@@ -0,0 +1,77 @@
+# chatbot_backend/summaries.py
+"""
+Background scheduling of rolling conversation summaries.
+
+After each exchange the conversation id is handed to `schedule()`; a small
+worker pool later folds the messages that dropped out of the recent-turn
+window into AiConversation.summary. Requests never wait for it. If a
+conversation is scheduled again while its job is still queued, the two
+requests collapse into one job.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a PAF-IAST "
+    "student and the university assistant. Merge the new messages into the "
+    "existing summary. Keep facts about the user (name, program, semester, "
+    "goals), the questions asked and the answers given. Write at most "
+    "{max_words} words of plain text, no preamble."
+)
+
+
+def summary_messages(previous_summary: str, new_lines, max_words: int = 120):
+    """Chat messages asking the model to fold `new_lines` into the summary."""
+    body = "Existing summary:\n" + (previous_summary or "(none yet)")
+    body += "\n\nNew messages:\n" + "\n".join(new_lines)
+    return [
+        {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(max_words=max_words)},
+        {"role": "user", "content": body},
+    ]
+
+
+class BackgroundSummarizer:
+    def __init__(self, job, max_workers: int = 1):
+        """`job(conversation_id)` does the actual DB read + LLM call + write."""
+        self.job = job
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="summarizer"
+        )
+        self._queued = set()
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.merged = 0
+        self.completed = 0
+        self.failed = 0
+
+    def schedule(self, conversation_id) -> None:
+        with self._lock:
+            if conversation_id in self._queued:
+                self.merged += 1
+                return
+            self._queued.add(conversation_id)
+            self.scheduled += 1
+        self._executor.submit(self._run, conversation_id)
+
+    def _run(self, conversation_id) -> None:
+        # unqueue first: an exchange finishing while we run schedules a new pass
+        with self._lock:
+            self._queued.discard(conversation_id)
+        try:
+            self.job(conversation_id)
+            self.completed += 1
+        except Exception as e:  # noqa: BLE001
+            self.failed += 1
+            logging.warning(f"Summary update for conversation {conversation_id} failed: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = len(self._queued)
+        return {
+            "queued": queued,
+            "scheduled": self.scheduled,
+            "merged": self.merged,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
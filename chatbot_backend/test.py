@@ -1,19 +1,55 @@
 import os
 from dotenv import load_dotenv
-import requests
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
-from sentence_transformers import SentenceTransformer
-from sklearn.neighbors import NearestNeighbors
+import threading
+import time
+from contextlib import closing
 import numpy as np
-from typing import Optional
+
+import index_store
+from ingest import Source, iter_source_chunks
+from embeddings import (
+    DEFAULT_BACKEND,
+    ONNX_INT8_FILE,
+    BatchingEmbedder,
+    green_threads_unpatched,
+    load_backend,
+)
+from chunking import CHUNKER_VERSION, chunk_document
+from caches import LRUCache, normalize_query
+from metrics import Counter
+from llm_client import ChatCompletionClient, CircuitBreaker, CircuitOpenError
+from memory import ConversationMemory
+from summaries import summary_messages
+from retrieval import (
+    EMPTY_INDEX,
+    KnowledgeIndex,
+    chunk_hash,
+    is_exact_token,
+    mmr_rerank,
+    normalize_rows,
+    reciprocal_rank_fusion,
+    tokenize,
+)
 
 # Load .env directly from current folder
 load_dotenv()
 
 API_KEY = os.getenv("GROQ_API_KEY")
-API_URL = "https://api.groq.com/openai/v1/chat/completions"
+API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 MODEL_NAME = "llama-3.1-8b-instant" 
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" (sentence-transformers) or "onnx-int8" (see embeddings.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", DEFAULT_BACKEND)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR") or None
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", ONNX_INT8_FILE)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0")) or None
+# Concurrent query embeddings are merged into one encode call: flushed after
+# EMBED_BATCH_WAIT_MS or at EMBED_BATCH_MAX texts (wait 0 = no batching).
+# A lone query is encoded at once. Needs a threaded server or eventlet with
+# monkey_patch(); plain `python app.py` under eventlet skips batching.
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
 
 # FILE PATHS
 DATA_FILE = "university_data.txt"
@@ -21,6 +57,66 @@ PROMPT_FILE = "prompts.txt"
 RESPONSE_FILE = "responses.txt"
 CHAT_LOG_FILE = "chat_history.txt"
 FALLBACK_DATA_FILE = "extra.txt"
+INDEX_DIR = os.getenv("INDEX_DIR", "index_cache")
+RULES_PDF_FILE = os.getenv(
+    "RULES_PDF_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "static", "rules.pdf"),
+)
+
+# Knowledge-base sources, each indexed as its own shard (see ingest.py)
+KB_SOURCES = {
+    "university_data": DATA_FILE,
+    "rules_pdf": RULES_PDF_FILE,
+    "extra": FALLBACK_DATA_FILE,
+}
+
+# Chunks scoring below this cosine similarity are treated as "not relevant"
+MIN_RELEVANCE_SCORE = float(os.getenv("MIN_RELEVANCE_SCORE", "0.0"))
+
+# How many distinct (normalized) questions keep their embedding in memory
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# Chunk budgets: CHUNK_UNIT is "chars" or "tokens" (estimated)
+CHUNK_MAX_SIZE = int(os.getenv("CHUNK_MAX_SIZE", "700"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "120"))
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+
+# "hybrid" (dense + BM25 fused with RRF), "dense" or "lexical"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# BM25 hits scoring below this, or sharing less than LEXICAL_MIN_COVERAGE
+# of the query terms, are treated as "not relevant" (the lexical
+# counterpart of MIN_RELEVANCE_SCORE, applied before fusion)
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "3.0"))
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.5"))
+# Keyword queries of up to this many words, one of them a code or acronym
+# ("CS-101", "CGPA"), may be answered by BM25 alone
+LEXICAL_FAST_PATH_MAX_TERMS = int(os.getenv("LEXICAL_FAST_PATH_MAX_TERMS", "3"))
+LEXICAL_FAST_PATH_MIN_SCORE = float(os.getenv("LEXICAL_FAST_PATH_MIN_SCORE", "3.0"))
+
+# Optional re-rank with maximal marginal relevance: pick top_k out of
+# MMR_CANDIDATES hits, trading relevance (lambda=1) against redundancy
+# (lambda=0). Off unless RETRIEVAL_MMR=1 or a caller passes mmr=True.
+RETRIEVAL_MMR = os.getenv("RETRIEVAL_MMR", "0") == "1"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_CANDIDATES = int(os.getenv("MMR_CANDIDATES", "12"))
+
+# Poll the data file every N seconds and hot-reload on change (0 = off)
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "5"))
+
+# Groq HTTP client: keep-alive pool + circuit breaker
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.05"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "15"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RECOVERY_SECONDS = float(os.getenv("BREAKER_RECOVERY_SECONDS", "30"))
+BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv("BREAKER_PROBE_TIMEOUT_SECONDS", "60"))
+
+# Per-conversation memory sent along with each question
+# (older turns are folded into the conversation summary, see summaries.py)
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "2"))
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "800"))
+MEMORY_MAX_CONVERSATIONS = int(os.getenv("MEMORY_MAX_CONVERSATIONS", "500"))
+MEMORY_IDLE_TTL = float(os.getenv("MEMORY_IDLE_TTL", "1800"))
 
 # Setup logging
 logging.basicConfig(
@@ -31,15 +127,110 @@ logging.basicConfig(
 
 class Assistant:
     def __init__(self):
-        self.error_count = 0
-        self.max_errors = 5
-        self.chat_history = []
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chunks = []
-        self.index: Optional[NearestNeighbors] = None
-        self.chunk_texts = []
-        self.embeddings = None
-        self.prepare_index(DATA_FILE)
+        # recent turns per conversation id (None = stateless, e.g. anonymous)
+        self.memory = ConversationMemory(
+            max_turns=MEMORY_MAX_TURNS,
+            max_tokens=MEMORY_MAX_TOKENS,
+            max_conversations=MEMORY_MAX_CONVERSATIONS,
+            idle_ttl=MEMORY_IDLE_TTL,
+        )
+        self.llm = ChatCompletionClient(
+            API_URL,
+            API_KEY,
+            MODEL_NAME,
+            pool_size=LLM_POOL_SIZE,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            breaker=CircuitBreaker(
+                BREAKER_FAILURE_THRESHOLD,
+                BREAKER_RECOVERY_SECONDS,
+                probe_timeout=BREAKER_PROBE_TIMEOUT_SECONDS,
+            ),
+        )
+        # background summaries get their own connections and breaker, so
+        # their 429s / timeouts never open the circuit for user-facing chat
+        self.summary_llm = ChatCompletionClient(
+            API_URL,
+            API_KEY,
+            MODEL_NAME,
+            pool_size=2,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            breaker=CircuitBreaker(
+                BREAKER_FAILURE_THRESHOLD,
+                BREAKER_RECOVERY_SECONDS,
+                probe_timeout=BREAKER_PROBE_TIMEOUT_SECONDS,
+            ),
+        )
+        # how long each part of startup took (ms), reported by /api/ready
+        self.startup_timings = {}
+        started = time.perf_counter()
+        # the backend imports its runtime (torch / onnxruntime) itself, so
+        # importing this module (and app.py) stays cheap
+        options = {}
+        if EMBEDDING_BACKEND == "onnx-int8":
+            options = {
+                "model_dir": ONNX_MODEL_DIR,
+                "model_file": ONNX_MODEL_FILE,
+                "threads": EMBEDDING_THREADS,
+            }
+        self.embedder = load_backend(EMBEDDING_BACKEND, EMBEDDING_MODEL, **options)
+        if EMBED_BATCH_WAIT_MS > 0 and green_threads_unpatched():
+            logging.warning(
+                "eventlet is loaded without monkey_patch(): requests share one "
+                "thread, so query embeddings are not batched"
+            )
+        elif EMBED_BATCH_WAIT_MS > 0:
+            self.embedder = BatchingEmbedder(
+                self.embedder, max_batch_size=EMBED_BATCH_MAX, max_wait_ms=EMBED_BATCH_WAIT_MS
+            )
+        # index artifacts are keyed by model *and* backend; plain torch keeps
+        # the bare model name so existing artifacts stay valid
+        self.embedding_id = (
+            EMBEDDING_MODEL
+            if self.embedder.name == "torch"
+            else f"{EMBEDDING_MODEL}@{self.embedder.name}"
+        )
+        self.startup_timings["embeddingModelMs"] = round((time.perf_counter() - started) * 1000, 1)
+        self.kb = EMPTY_INDEX
+        self.min_score = MIN_RELEVANCE_SCORE
+        self.lexical_min_score = LEXICAL_MIN_SCORE
+        self.lexical_min_coverage = LEXICAL_MIN_COVERAGE
+        self.retrieval_mode = RETRIEVAL_MODE
+        self._fast_path_hits = Counter()
+        self.mmr = RETRIEVAL_MMR
+        self.mmr_lambda = MMR_LAMBDA
+        self.mmr_candidates = MMR_CANDIDATES
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE)
+        self.sources = [Source(name, path) for name, path in KB_SOURCES.items()]
+        self.shards = {}  # source name -> KnowledgeIndex
+        self._stamps = {}  # source name -> file stamp the shard was built from
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        started = time.perf_counter()
+        self.prepare_index()
+        self.startup_timings["indexMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    # Read-only views of the current snapshot (kept for older callers)
+    @property
+    def chunks(self):
+        return self.kb.chunks
+
+    @property
+    def chunk_texts(self):
+        return self.kb.chunk_texts
+
+    @property
+    def embeddings(self):
+        return self.kb.embeddings
+
+    @property
+    def index_hash(self):
+        return self.kb.index_hash
+
+    @property
+    def lexical_fast_path_hits(self):
+        return self._fast_path_hits.value
 
     def load_file(self, filename):
         try:
@@ -49,75 +240,389 @@ class Assistant:
             logging.warning(f"File load failed: {str(e)}")
             return ""
 
-    def chunk_text(self, text, chunk_size=8):
-        lines = text.split('\n')
-        chunks = []
-        for i in range(0, len(lines), chunk_size):
-            chunk = '\n'.join(lines[i:i + chunk_size]).strip()
-            if chunk:
-                chunks.append(chunk)
-        return chunks
-
-    def prepare_index(self, data_file):
-        data = self.load_file(data_file)
-        self.chunks = self.chunk_text(data)
-        self.chunk_texts = self.chunks
-        self.embeddings = self.model.encode(self.chunks, convert_to_numpy=True)
-        self.index = NearestNeighbors(n_neighbors=3, metric="cosine")
-        self.index.fit(self.embeddings)
-
-    def semantic_search(self, query, top_k=3):
-        if not self.index or self.embeddings is None or len(self.chunk_texts) == 0:
-            logging.warning("Semantic search called but index is not ready.")
-            return ""
+    def chunk_text(self, text):
+        """Split the corpus along headings/paragraphs/lists (see chunking.py)."""
+        return chunk_document(
+            text, max_size=CHUNK_MAX_SIZE, overlap=CHUNK_OVERLAP, unit=CHUNK_UNIT
+        )
 
-        query_vec = self.model.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.kneighbors(query_vec, n_neighbors=min(top_k, len(self.chunk_texts)))
-        return '\n\n'.join([self.chunk_texts[i] for i in indices[0] if i < len(self.chunk_texts)])
+    def prepare_shard(self, source):
+        """
+        Build (or load) the shard for one source. Returns True if the shard
+        changed. Does not touch self.kb; prepare_index merges the shards.
 
+        An artifact for the exact file content is loaded from disk with
+        mmap. Otherwise the source is re-chunked and only chunks whose
+        content hash is not already embedded – in the current shard or in
+        the newest compatible artifact on disk – go through the encoder.
+        """
+        started = time.perf_counter()
+        stamp = source.stamp()
+        if stamp is None:
+            if source.name in self.shards:
+                logging.warning(f"Knowledge source {source.path} disappeared, dropping it")
+                self.shards = {n: s for n, s in self.shards.items() if n != source.name}
+                self._stamps[source.name] = None
+                return True
+            if source.name not in self._stamps:
+                logging.warning(f"Knowledge source {source.path} not found, skipping")
+            self._stamps[source.name] = None
+            return False
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def get_response(self, question, context):
-        if self.error_count >= self.max_errors:
-            return "System needs restart. Please try again later."
+        params = {
+            "max_size": CHUNK_MAX_SIZE,
+            "overlap": CHUNK_OVERLAP,
+            "unit": CHUNK_UNIT,
+            "chunker": CHUNKER_VERSION,
+        }
+        shard_dir = os.path.join(INDEX_DIR, source.name)
+        index_hash = index_store.index_key(source.fingerprint(), self.embedding_id, params)
+        current = self.shards.get(source.name)
 
-        try:
-            messages = [{"role": "system", "content": "You are PAF-IAST assistant. Answer based on: " + context[:1500]}]
-            messages.extend(self.chat_history)
-            messages.append({"role": "user", "content": question})
-
-            response = requests.post(
-                API_URL,
-                headers={
-                    "Authorization": f"Bearer {API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": MODEL_NAME,
-                    "messages": messages,
-                    "temperature": 0.6,
-                    "max_tokens": 1024
-                },
-                timeout=15
+        if current is not None and index_hash == current.index_hash:
+            self._stamps[source.name] = stamp
+            return False
+
+        # Warm start: reuse the stored embeddings if content + model are unchanged
+        cached = index_store.load_index(shard_dir, index_hash)
+        if cached is not None:
+            shard = KnowledgeIndex(
+                cached["chunks"], cached["embeddings"], index_hash, normalized=True
             )
+            self.shards = dict(self.shards, **{source.name: shard})
+            self._stamps[source.name] = stamp
+            return True
+
+        try:
+            chunks = list(iter_source_chunks(source, self.chunk_text))
+        except ImportError as e:
+            logging.warning(f"Cannot read {source.path} ({str(e)}), skipping it")
+            self._stamps[source.name] = stamp
+            return False
+        if not chunks:
+            logging.warning(f"No chunks to index in {source.path}")
+            self._stamps[source.name] = stamp
+            return False
+
+        # Embeddings we already have, keyed by chunk content hash
+        known = {}
+        previous = [current] if current is not None else []
+        if current is None:
+            stored = index_store.load_latest_compatible(shard_dir, self.embedding_id, params)
+            if stored is not None:
+                previous.append(
+                    KnowledgeIndex(stored["chunks"], stored["embeddings"], normalized=True)
+                )
+        for old in previous:
+            for h, row in old.rows_by_hash().items():
+                known.setdefault(h, old.embeddings[row])
+
+        texts = [c["text"] for c in chunks]
+        hashes = [chunk_hash(t) for t in texts]
+        todo = [i for i, h in enumerate(hashes) if h not in known]
 
-            if response.status_code != 200:
-                logging.warning(f"API error {response.status_code}: {response.text}")
-                raise Exception(f"API error {response.status_code}")
+        if todo:
+            encoded = self.embedder.encode([texts[i] for i in todo])
+            for i, vec in zip(todo, encoded):
+                known[hashes[i]] = vec
 
-            data = response.json()
-            reply = data['choices'][0]['message']['content'].strip()
-            self.error_count = 0
+        # stored with unit-length rows, so a warm start can search the mmap as is
+        embeddings = normalize_rows(
+            np.vstack([np.asarray(known[h], dtype=np.float32) for h in hashes])
+        )
+        index_store.save_index(
+            shard_dir,
+            index_hash,
+            embeddings,
+            chunks,
+            {
+                "source": source.name,
+                "source_file": source.path,
+                "model": self.embedding_id,
+                "params": params,
+            },
+        )
 
-            self.chat_history.append({"role": "user", "content": question})
-            self.chat_history.append({"role": "assistant", "content": reply})
+        shard = KnowledgeIndex(chunks, embeddings, index_hash, normalized=True)
+        self.shards = dict(self.shards, **{source.name: shard})
+        self._stamps[source.name] = stamp
 
-            return reply
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.warning(
+            f"Knowledge source {source.name} indexed from {source.path} in {elapsed_ms:.0f} ms: "
+            f"{len(todo)}/{len(chunks)} chunks re-embedded"
+        )
+        return True
 
+    def prepare_index(self, sources=None):
+        """
+        Bring the shards of `sources` (default: all) up to date and swap in
+        the merged index if any of them changed.
+        """
+        changed = False
+        for source in sources or self.sources:
+            changed = self.prepare_shard(source) or changed
+
+        if changed or self.kb is EMPTY_INDEX:
+            # single reference swap: searches already running keep the old snapshot
+            self.kb = KnowledgeIndex.merge(self.shards)
+
+    def reload_if_changed(self):
+        """Re-index the sources whose mtime/size changed. Returns True if the index did."""
+        stale = [s for s in self.sources if s.stamp() != self._stamps.get(s.name)]
+        if not stale:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # a reload is already running
+        try:
+            old_hash = self.kb.index_hash
+            self.prepare_index(stale)
+            return self.kb.index_hash != old_hash
+        except Exception as e:
+            logging.warning(f"Knowledge base reload failed: {str(e)}")
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def kb_stats(self) -> dict:
+        """Per-source shard sizes for /api/metrics."""
+        shards = self.shards
+        return {
+            s.name: {
+                "path": s.path,
+                "chunks": len(shards[s.name]) if s.name in shards else 0,
+                "indexed": s.name in shards,
+            }
+            for s in self.sources
+        }
+
+    def start_watcher(self, interval=KB_WATCH_INTERVAL):
+        """Poll the source files in a daemon thread and hot-reload on change."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=watch, name="kb-watcher", daemon=True)
+        self._watcher.start()
+
+    def embed_queries(self, queries):
+        """
+        Embed questions, going through the LRU cache first so repeated
+        questions skip the encoder. Misses are encoded in a single call.
+        """
+        keys = [normalize_query(q) for q in queries]
+        vectors = [self.query_cache.get(k) for k in keys]
+
+        missing = sorted({k for k, v in zip(keys, vectors) if v is None})
+        if missing:
+            encoded = self.embedder.encode(missing)
+            fresh = {}
+            for key, vec in zip(missing, encoded):
+                vec = np.asarray(vec, dtype=np.float32)
+                vec.setflags(write=False)
+                self.query_cache.put(key, vec)
+                fresh[key] = vec
+            vectors = [v if v is not None else fresh[k] for k, v in zip(keys, vectors)]
+
+        return np.vstack(vectors)
+
+    def lexical_fast_path(self, query, top_k=3, kb=None):
+        """
+        Hits for short keyword queries built around a code or acronym
+        ("CS-101", "CGPA", "HoD approval") that BM25 answers confidently on
+        its own, or None if the encoder is needed. Questions ("What is the
+        minimum CGPA?") and plain words ("hostel") go through the encoder.
+        """
+        kb = self.kb if kb is None else kb
+        words = query.split()
+        terms = tokenize(query)
+        if not terms or len(words) > LEXICAL_FAST_PATH_MAX_TERMS:
+            return None
+        if len(terms) != len(words) or "?" in query:
+            return None  # a question, not a keyword query
+        if not any(is_exact_token(w) for w in words):
+            return None
+
+        hits = self.lexical_search(query, top_k=top_k, kb=kb)
+        if not hits or hits[0][1] < LEXICAL_FAST_PATH_MIN_SCORE:
+            return None
+        if not kb.lexical.covers(query, hits[0][0]):
+            return None
+        self._fast_path_hits.increment()
+        return hits
+
+    def lexical_search(self, query, top_k=3, kb=None):
+        """BM25 hits that pass self.lexical_min_score and self.lexical_min_coverage."""
+        kb = self.kb if kb is None else kb
+        return [
+            (i, score)
+            for i, score in kb.lexical.search(query, top_k=top_k)
+            if score >= self.lexical_min_score
+            and kb.lexical.coverage(query, i) >= self.lexical_min_coverage
+        ]
+
+    def search_chunks_batch(self, queries, top_k=3, min_score=None, mode=None, kb=None, mmr=None):
+        """
+        Retrieve for several queries at once (one encode call, one matrix
+        product). Returns a list of [(chunk_index, score), ...] per query;
+        an empty list means nothing relevant was found.
+
+        mode="dense"  : cosine scores, filtered by `min_score`
+        mode="lexical": BM25 scores filtered by self.lexical_min_score
+                        and self.lexical_min_coverage, no encoder call
+        mode="hybrid" : dense and BM25 hits that pass their own threshold,
+                        merged with reciprocal rank fusion (scores are RRF
+                        values); short keyword queries take the lexical
+                        fast path and skip the encoder.
+
+        With mmr (default: self.mmr) each mode first collects
+        self.mmr_candidates hits and MMR picks top_k of them using the
+        chunk embeddings already in the index.
+
+        Indices refer to `kb` (default: the current snapshot); pass the same
+        snapshot when resolving them if a reload may happen in between.
+        """
+        # an empty source subset is a real (empty) index, not "use the default"
+        kb = self.kb if kb is None else kb
+        if not len(kb):
+            if kb is self.kb:
+                logging.warning("Semantic search called but index is not ready.")
+            return [[] for _ in queries]
+
+        if min_score is None:
+            min_score = self.min_score
+        mode = mode or self.retrieval_mode
+        mmr = self.mmr if mmr is None else mmr
+        queries = list(queries)
+        want = max(top_k, self.mmr_candidates) if mmr else top_k
+
+        results = [None] * len(queries)
+        if mode == "lexical":
+            results = [self.lexical_search(q, top_k=want, kb=kb) for q in queries]
+        elif mode == "hybrid":
+            for i, q in enumerate(queries):
+                results[i] = self.lexical_fast_path(q, top_k=want, kb=kb)
+
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            # over-fetch dense candidates so fusion has something to re-rank
+            pool = want * 4 if mode == "hybrid" else want
+            query_vecs = self.embed_queries([queries[i] for i in pending])
+            dense = kb.vectors.search(query_vecs, top_k=pool, min_score=min_score)
+
+            for i, dense_hits in zip(pending, dense):
+                if mode == "hybrid":
+                    lexical_hits = self.lexical_search(queries[i], top_k=pool, kb=kb)
+                    results[i] = reciprocal_rank_fusion([dense_hits, lexical_hits], top_k=want)
+                else:
+                    results[i] = dense_hits
+
+        if mmr:
+            return [
+                mmr_rerank(hits, kb.vectors, top_k=top_k, lambda_=self.mmr_lambda)
+                for hits in results
+            ]
+        return [hits[:top_k] for hits in results]
+
+    def search_chunks(self, query, top_k=3, min_score=None, mode=None, kb=None, mmr=None):
+        return self.search_chunks_batch(
+            [query], top_k=top_k, min_score=min_score, mode=mode, kb=kb, mmr=mmr
+        )[0]
+
+    def knowledge(self, sources=None, kb=None):
+        """
+        The index (default: the current snapshot), or the part of it built
+        from `sources` (names).
+        """
+        kb = self.kb if kb is None else kb
+        # sources=[] is an empty subset, not "all sources"
+        return kb.subset(sources) if sources is not None else kb
+
+    def retrieve(self, query, top_k=3, min_score=None, mode=None, sources=None, mmr=None, kb=None):
+        """
+        Ranked chunk dicts ({"text", "section", "line", "source", "score"}
+        plus "page" for PDF chunks) for a query. `sources` restricts the
+        search to those KB_SOURCES names; mmr=True drops near-duplicates.
+        Pass `kb` (a snapshot of self.kb) to search the same index version
+        the caller caches its answer under.
+        """
+        return self.retrieve_batch(
+            [query], top_k=top_k, min_score=min_score, mode=mode, sources=sources, mmr=mmr, kb=kb
+        )[0]
+
+    def retrieve_batch(
+        self, queries, top_k=3, min_score=None, mode=None, sources=None, mmr=None, kb=None
+    ):
+        """retrieve() for many queries: one encode call and one matrix product."""
+        kb = self.knowledge(sources, kb)
+        results = self.search_chunks_batch(
+            queries, top_k=top_k, min_score=min_score, mode=mode, kb=kb, mmr=mmr
+        )
+        return [[dict(kb.chunks[i], score=score) for i, score in hits] for hits in results]
+
+    def semantic_search(self, query, top_k=3, min_score=None, mode=None, sources=None, mmr=None):
+        kb = self.knowledge(sources)
+        hits = self.search_chunks(
+            query, top_k=top_k, min_score=min_score, mode=mode, kb=kb, mmr=mmr
+        )
+        return '\n\n'.join([kb.chunk_texts[i] for i, _ in hits])
+
+
+    def get_response(self, question, context, conversation_id=None):
+        return self.answer(question, context, conversation_id)[0]
+
+    def build_messages(self, question, context, conversation_id=None):
+        # context arrives already budgeted (see context_builder.py)
+        messages = [{"role": "system", "content": "You are PAF-IAST assistant. Answer based on: " + context}]
+        messages.extend(self.memory.history(conversation_id))
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def stream_answer(self, question, context, conversation_id=None):
+        """
+        Yield the reply token by token as the API streams it. Errors
+        (CircuitOpenError, UpstreamError, ...) propagate to the caller,
+        which decides what to show; memory is only updated on success.
+        """
+        messages = self.build_messages(question, context, conversation_id)
+        parts = []
+        # closing(): if our consumer stops early, the client stream is closed
+        # right away, so the circuit breaker hears about it
+        with closing(self.llm.stream(messages, temperature=0.6, max_tokens=1024)) as tokens:
+            for token in tokens:
+                parts.append(token)
+                yield token
+
+        reply = "".join(parts).strip()
+        self.memory.append(conversation_id, question, reply)
+
+    def answer(self, question, context, conversation_id=None):
+        """
+        Same as get_response, but returns (reply, ok) so callers can tell a
+        real answer from the fallback text shown on errors.
+        """
+        messages = self.build_messages(question, context, conversation_id)
+
+        try:
+            reply = self.llm.complete(messages, temperature=0.6, max_tokens=1024)
+        except CircuitOpenError:
+            return "The assistant is temporarily unavailable. Please try again in a minute.", False
         except Exception as e:
-            self.error_count += 1
             logging.warning(f"API Exception: {str(e)}")
-            return f"Temporary issue. Please try again. ({self.error_count}/{self.max_errors})"
+            return "Temporary issue. Please try again.", False
+
+        self.memory.append(conversation_id, question, reply)
+
+        return reply, True
+
+    def summarize(self, previous_summary, new_lines, max_words=120):
+        """Fold `new_lines` ("User: ..." / "Assistant: ...") into a summary."""
+        messages = summary_messages(previous_summary, new_lines, max_words=max_words)
+        return self.summary_llm.complete(messages, temperature=0.2, max_tokens=max_words * 2)
 
     def save_conversation(self, user_input, response):
         try:
@@ -135,7 +640,6 @@ class Assistant:
 def main():
     print("PAF-IAST Assistant (type 'exit' to quit)\n")
     bot = Assistant()
-    extra_data = bot.load_file(FALLBACK_DATA_FILE)
 
     while True:
         try:
@@ -147,22 +651,16 @@ def main():
                 print("Goodbye!")
                 break
 
+            # extra.txt is one of the indexed sources, no separate fallback
             context = bot.semantic_search(user_input)
-            if not context:
-                context = bot.semantic_search(extra_data)
-
             if not context or context.strip() == "":
                 print("Bot: Sorry, I can only answer university-related queries.\n")
                 continue
 
-            response = bot.get_response(user_input, context)
+            response = bot.get_response(user_input, context, conversation_id="cli")
             print(f"Bot: {response}\n")
             bot.save_conversation(user_input, response)
 
-            if bot.error_count >= bot.max_errors:
-                print("Too many errors. Restart required.")
-                break
-
         except KeyboardInterrupt:
             print("\nSession ended")
             break
@@ -0,0 +1,6 @@
+# chatbot_backend/tests/conftest.py
+"""The backend modules import each other flat (`from models import db`)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
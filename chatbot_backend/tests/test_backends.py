@@ -0,0 +1,193 @@
+# chatbot_backend/tests/test_backends.py
+"""
+Migrations, history rollups and keyset pages on every supported backend.
+
+SQLite always runs. Postgres runs against TEST_POSTGRES_URL (or a postgres
+DATABASE_URL) and is skipped when neither is set or the server is down.
+The Postgres tests work in a throwaway schema, dropped afterwards, so they
+never touch the tables of the database they connect to.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+import db_config
+import migrations
+from models import (
+    db,
+    User,
+    AiConversation,
+    AiMessage,
+    DailyHistory,
+    rebuild_daily_history,
+    sync_conversation_stats,
+)
+from pagination import PageRequest, decode_cursor, keyset_page
+
+
+def postgres_url():
+    url = os.getenv("TEST_POSTGRES_URL") or os.getenv("DATABASE_URL") or ""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url if url.startswith("postgresql") else None
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def backend(request, tmp_path):
+    """An app context on a fresh, fully migrated database."""
+    if request.param == "sqlite":
+        uri = f"sqlite:///{tmp_path / 'users.db'}"
+        options = db_config.engine_options(uri)
+        cleanup = None
+    else:
+        uri = postgres_url()
+        if uri is None:
+            pytest.skip("set TEST_POSTGRES_URL to run the Postgres tests")
+        pytest.importorskip("psycopg2")
+        schema = f"test_{uuid.uuid4().hex[:12]}"
+        admin = create_engine(uri)
+        try:
+            with admin.begin() as conn:
+                conn.execute(text(f"CREATE SCHEMA {schema}"))
+        except Exception as exc:  # noqa: BLE001
+            admin.dispose()
+            pytest.skip(f"Postgres not available: {exc}")
+        options = db_config.engine_options(uri)
+        options["connect_args"] = {"options": f"-csearch_path={schema}"}
+
+        def cleanup():
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+            admin.dispose()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db_config.apply_sqlite_pragmas(db.engine)
+            assert len(migrations.upgrade()) == len(migrations.MIGRATIONS)
+            yield db.engine.dialect.name
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        if cleanup:
+            cleanup()
+
+
+def add_chat(user, start, texts):
+    """One conversation of alternating user/ai messages, a minute apart."""
+    conv = AiConversation(user_id=user.id, title=texts[0])
+    db.session.add(conv)
+    db.session.flush()
+    for i, text_ in enumerate(texts):
+        db.session.add(
+            AiMessage(
+                conversation_id=conv.id,
+                sender="user" if i % 2 == 0 else "ai",
+                text=text_,
+                created_at=start + timedelta(minutes=i),
+            )
+        )
+    db.session.commit()
+    return conv
+
+
+def daily_rows(user_id):
+    return [
+        (row.day, row.message_count, row.first_at, row.last_at, row.snippet)
+        for row in DailyHistory.query.filter_by(user_id=user_id).order_by(DailyHistory.day)
+    ]
+
+
+def test_rollups_on_insert_and_delete(backend):
+    user = User(full_name="A", email="a@x", password_hash="h", role="STUDENT")
+    db.session.add(user)
+    db.session.commit()
+    day1 = datetime(2025, 3, 1, 23, 58)
+    conv = add_chat(user, day1, ["q1", "a1", "q2 crosses midnight", "a2"])
+    add_chat(user, day1 + timedelta(hours=12), ["q3", "a3"])
+
+    # track_last_ai_message
+    db.session.refresh(conv)
+    last = AiMessage.query.filter_by(conversation_id=conv.id).order_by(AiMessage.id.desc()).first()
+    assert (conv.message_count, conv.last_message_id, conv.last_snippet) == (4, last.id, "a2")
+
+    # roll_up_ai_message: the upsert on (user_id, day)
+    assert daily_rows(user.id) == [
+        (day1.date(), 2, day1, day1 + timedelta(minutes=1), "q1"),
+        (
+            day1.date() + timedelta(days=1),
+            4,
+            day1 + timedelta(minutes=2),
+            day1 + timedelta(hours=12, minutes=1),
+            "q2 crosses midnight",
+        ),
+    ]
+
+    # deletes: sync_conversation_stats + rebuild_daily_history
+    db.session.delete(last)
+    db.session.delete(AiMessage.query.filter_by(text="q1").one())
+    db.session.flush()
+    sync_conversation_stats(AiConversation.id == conv.id)
+    rebuild_daily_history(user.id, [day1.date(), day1.date() + timedelta(days=1)])
+    db.session.commit()
+
+    db.session.refresh(conv)
+    assert (conv.message_count, conv.last_snippet) == (2, "q2 crosses midnight")
+    assert daily_rows(user.id) == [
+        (day1.date(), 1, day1 + timedelta(minutes=1), day1 + timedelta(minutes=1), None),
+        (
+            day1.date() + timedelta(days=1),
+            3,
+            day1 + timedelta(minutes=2),
+            day1 + timedelta(hours=12, minutes=1),
+            "q2 crosses midnight",
+        ),
+    ]
+
+
+def test_keyset_pages_and_hot_queries(backend):
+    users = [
+        User(
+            full_name=f"U{i}",
+            email=f"u{i}@x",
+            password_hash="h",
+            role="STUDENT" if i % 2 else "CONSULTANT",
+            created_at=datetime(2025, 1, 1) + timedelta(minutes=i // 2),  # ties
+        )
+        for i in range(7)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    conv = add_chat(users[0], datetime(2025, 1, 2), [f"m{i}" for i in range(9)])
+
+    def walk(query, created_col, id_col, newest_first):
+        """Page ids from the newest page back, following page.before."""
+        pages, before = [], None
+        while True:
+            page = PageRequest(3, before=decode_cursor(before) if before else None)
+            rows, info = keyset_page(query, created_col, id_col, page, newest_first)
+            pages.append([row.id for row in rows])
+            if not info["hasMore"]:
+                return pages
+            before = info["before"]
+
+    messages = walk(
+        AiMessage.query.filter_by(conversation_id=conv.id), AiMessage.created_at, AiMessage.id, False
+    )
+    all_ids = [m.id for m in AiMessage.query.order_by(AiMessage.created_at, AiMessage.id)]
+    assert [i for page in reversed(messages) for i in page] == all_ids
+
+    newest = walk(User.query, User.created_at, User.id, True)
+    expected = [u.id for u in User.query.order_by(User.created_at.desc(), User.id.desc())]
+    assert [i for page in newest for i in page] == expected
+
+    # every query behind the busiest endpoints runs on this backend
+    for _, query, _ in migrations.hot_queries():
+        query.all()
@@ -0,0 +1,151 @@
+# chatbot_backend/tests/test_caches.py
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import caches
+from caches import LRUCache, SemanticAnswerCache, SingleFlight, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   CGPA?") == normalize_query("what is cgpa") == "what is cgpa"
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(caches, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_semantic_cache_threshold(clock):
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("What is CGPA?", vec(1, 0, 0), "grade average", "h1")
+
+    assert cache.lookup(vec(2, 0.1, 0), "h1") == "grade average"  # cosine ~0.999
+    assert cache.lookup(vec(1, 1, 0), "h1") is None  # cosine ~0.707
+    assert cache.lookup(vec(0, 0, 0), "h1") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_semantic_cache_ttl(clock):
+    cache = SemanticAnswerCache(ttl=60)
+    cache.store("q1", vec(1, 0), "a1", "h1")
+    clock[0] += 30
+    cache.store("q2", vec(0, 1), "a2", "h1")
+
+    clock[0] += 31  # q1 is 61s old, q2 31s
+    assert cache.lookup(vec(1, 0), "h1") is None
+    assert cache.lookup(vec(0, 1), "h1") == "a2"
+    assert len(cache) == 1
+
+
+def test_semantic_cache_drops_entries_when_the_index_changes(clock):
+    cache = SemanticAnswerCache()
+    cache.store("q1", vec(1, 0), "a1", "h1")
+    assert cache.lookup(vec(1, 0), "h1") == "a1"
+
+    assert cache.lookup(vec(1, 0), "h2") is None
+    assert len(cache) == 0 and cache.invalidations == 1
+
+    # answers stored against the new index are served again
+    cache.store("q1", vec(1, 0), "a1 (new)", "h2")
+    assert cache.lookup(vec(1, 0), "h2") == "a1 (new)"
+
+
+def test_semantic_cache_evicts_the_least_recently_used(clock):
+    cache = SemanticAnswerCache(maxsize=2)
+    cache.store("q1", vec(1, 0, 0), "a1", "h")
+    cache.store("q2", vec(0, 1, 0), "a2", "h")
+    assert cache.lookup(vec(1, 0, 0), "h") == "a1"
+    cache.store("q3", vec(0, 0, 1), "a3", "h")
+    assert cache.lookup(vec(0, 1, 0), "h") is None
+    assert cache.lookup(vec(1, 0, 0), "h") == "a1"
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+
+    def worker():
+        results.append(flight.do("q", slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    # let every follower join the leader's call before it finishes
+    for _ in range(500):
+        if flight.coalesced == 7:
+            break
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("answer", False)] + [("answer", True)] * 7
+    assert flight.stats()["inFlight"] == 0
+
+    # once finished, the next call runs again
+    assert flight.do("q", lambda: "again") == ("again", False)
+
+
+def test_single_flight_shares_the_error():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("q", failing)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    for _ in range(500):
+        if flight.coalesced == 1:
+            break
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["boom", "boom"]
+    assert flight.executions == 1
@@ -0,0 +1,60 @@
+# chatbot_backend/tests/test_chunking.py
+import os
+
+import pytest
+
+from chunking import _is_heading, chunk_document, estimate_tokens
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "university_data.txt")
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize(
+    "max_size, overlap, unit",
+    [(700, 120, "chars"), (300, 60, "chars"), (100, 20, "chars"), (150, 30, "tokens")],
+)
+def test_budget_is_a_hard_cap(corpus, max_size, overlap, unit):
+    measure = estimate_tokens if unit == "tokens" else len
+    chunks = chunk_document(corpus, max_size=max_size, overlap=overlap, unit=unit)
+    assert chunks
+    assert max(measure(c["text"]) for c in chunks) <= max_size
+
+
+def test_overlong_line_is_split():
+    text = "Long Rule\n\n" + "word " * 1000 + "\n" + "x" * 5000
+    chunks = chunk_document(text, max_size=100, overlap=20)
+    assert max(len(c["text"]) for c in chunks) <= 100
+    joined = " ".join(c["text"] for c in chunks)
+    assert joined.count("word") >= 1000
+    assert joined.count("x") >= 5000
+
+
+def test_headings_are_merged_into_their_content(corpus):
+    chunks = chunk_document(corpus)
+    headings_only = [
+        c["text"] for c in chunks if all(
+            _is_heading(line) or line == c["section"].split(" > ")[-1]
+            for line in c["text"].split("\n") if line.strip()
+        )
+    ]
+    assert headings_only == []
+
+    hostels = next(c for c in chunks if c["text"].startswith("Hostels\n"))
+    assert "Boys’ Hostels" in hostels["text"]
+    assert "Education For Prevention" not in hostels["section"]
+    assert hostels["section"].endswith("PAF-IAST Hostels Overview > Hostels")
+
+    grading = next(c for c in chunks if c["text"].startswith("## - 2. Grading"))
+    assert "Grade Point Average" in grading["text"]
+
+
+def test_facts_are_not_titles():
+    text = "Campus\n\nTotal Hostels: 2\n\nRooms per Floor: 30 rooms\n"
+    chunks = chunk_document(text)
+    assert len(chunks) == 1
+    assert chunks[0]["section"] == "Campus"
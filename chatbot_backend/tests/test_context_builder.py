@@ -0,0 +1,65 @@
+# chatbot_backend/tests/test_context_builder.py
+from context_builder import ContextAssembler
+
+
+def words(text):
+    return len(text.split())
+
+
+def test_sections_fill_by_priority_within_their_caps():
+    assembler = ContextAssembler(max_tokens=10, count_tokens=words)
+    assembler.add("system", "s1 s2", priority=0)
+    assembler.add("knowledge", ["k1 k1", "k2 k2", "k3 k3"], priority=1, max_tokens=4)
+    assembler.add("profile", "p1 p2", priority=2)
+    assembler.add("history", ["h1", "h2", "h3", "h4", "h5"], priority=3, drop="head")
+    context, report = assembler.build()
+
+    # output keeps the order sections were added in, not their priority
+    assert context == "s1 s2\n\nk1 k1\nk2 k2\n\np1 p2\n\nh4\nh5"
+    sections = report["sections"]
+    assert sections["knowledge"] == {"tokens": 4, "items": 2, "dropped": 1}  # lowest-ranked chunk
+    assert sections["history"] == {"tokens": 2, "items": 2, "dropped": 3}  # oldest lines
+    assert sections["profile"]["dropped"] == 0
+    assert report["total"] == 10 == report["budget"]
+
+
+def test_higher_priority_sections_are_never_squeezed_by_later_ones():
+    assembler = ContextAssembler(max_tokens=4, count_tokens=words)
+    assembler.add("history", ["h1", "h2", "h3"], priority=3, drop="head")
+    assembler.add("system", "s1 s2 s3", priority=0)
+    context, report = assembler.build()
+    assert context == "h3\n\ns1 s2 s3"
+    assert report["sections"]["system"]["dropped"] == 0
+
+
+def test_headers_count_against_the_budget():
+    assembler = ContextAssembler(max_tokens=4, count_tokens=words)
+    assembler.add("knowledge", ["k1", "k2", "k3"], priority=0, header="Relevant info:")
+    context, report = assembler.build()
+    assert context == "Relevant info:\nk1\nk2"
+    assert report["sections"]["knowledge"]["dropped"] == 1
+
+
+def test_an_oversized_item_is_clipped_not_dropped():
+    # the default estimator: ~4 characters per token
+    ranked = ContextAssembler(max_tokens=5)
+    ranked.add("knowledge", ["a" * 80, "b" * 80], priority=0)
+    context, report = ranked.build()
+    assert context == "a" * 20 + "…"  # the best-ranked chunk survives
+    assert report["sections"]["knowledge"]["items"] == 1
+
+    history = ContextAssembler(max_tokens=5)
+    history.add("history", ["a" * 80, "b" * 80], priority=0, drop="head")
+    context, _ = history.build()
+    assert context == "b" * 20 + "…"  # the newest line survives
+
+
+def test_empty_sections_and_exhausted_budget():
+    assembler = ContextAssembler(max_tokens=2, count_tokens=words)
+    assembler.add("profile", ["", "  "], priority=0)
+    assembler.add("system", "s1 s2", priority=1)
+    assembler.add("history", ["h1"], priority=2)
+    context, report = assembler.build()
+    assert context == "s1 s2"
+    assert "profile" not in report["sections"]
+    assert report["sections"]["history"] == {"tokens": 0, "items": 0, "dropped": 1}
@@ -0,0 +1,89 @@
+# chatbot_backend/tests/test_embeddings.py
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from embeddings import BatchingEmbedder, EmbeddingBackend
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlowBackend(EmbeddingBackend):
+    """Rows are [len(text)]; every encode call takes `delay` seconds."""
+
+    name = "slow"
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        self.calls.append(len(texts))
+        time.sleep(self.delay)
+        return np.array([[len(t)] for t in texts], dtype=np.float32)
+
+
+def test_lone_query_does_not_wait_for_the_window():
+    backend = SlowBackend(delay=0)
+    embedder = BatchingEmbedder(backend, max_wait_ms=500)
+    started = time.perf_counter()
+    assert embedder.encode(["abc"]).tolist() == [[3.0]]
+    assert time.perf_counter() - started < 0.25
+
+
+def test_concurrent_queries_share_a_batch():
+    backend = SlowBackend(delay=0.05)
+    embedder = BatchingEmbedder(backend, max_wait_ms=20)
+    results = {}
+
+    def ask(i):
+        results[i] = embedder.encode(["x" * i]).tolist()
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: [[float(i)]] for i in range(1, 9)}
+    # the first request may go alone; the rest queue up behind it
+    assert len(backend.calls) < 8
+    assert sum(backend.calls) == 8
+
+
+def test_backends_are_abstract():
+    with pytest.raises(TypeError):
+        EmbeddingBackend()
+
+
+def test_onnx_int8_matches_torch():
+    pytest.importorskip("torch")
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    from bench import PARITY_MIN_COSINE, SAMPLE_QUERIES
+    from chunking import chunk_document
+    from embeddings import load_backend
+    from retrieval import normalize_rows
+
+    model = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    onnx_options = {"model_dir": os.getenv("ONNX_MODEL_DIR") or None}
+    if os.getenv("ONNX_MODEL_FILE"):
+        onnx_options["model_file"] = os.getenv("ONNX_MODEL_FILE")
+    try:
+        torch_backend = load_backend("torch", model)
+        onnx_backend = load_backend("onnx-int8", model, **onnx_options)
+    except OSError as exc:  # no local copy and no network
+        pytest.skip(f"embedding model not available: {exc}")
+
+    with open(os.path.join(BACKEND_DIR, "university_data.txt"), encoding="utf-8") as f:
+        chunks = [c["text"] for c in chunk_document(f.read())][:32]
+    texts = SAMPLE_QUERIES + chunks
+
+    a = normalize_rows(torch_backend.encode(texts))
+    b = normalize_rows(onnx_backend.encode(texts))
+    cosines = (a * b).sum(axis=1)
+    assert cosines.min() >= PARITY_MIN_COSINE, texts[int(cosines.argmin())]
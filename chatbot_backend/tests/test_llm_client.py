@@ -0,0 +1,210 @@
+# chatbot_backend/tests/test_llm_client.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import ChatCompletionClient, CircuitBreaker, CircuitOpenError, UpstreamError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-style completions; `server.status` switches it to failing."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.server.status != 200:
+            self._send(self.server.status, b'{"error": "down"}')
+        elif body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = [{"choices": [{"delta": {"content": t}}]} for t in ("Hel", "lo", "!")]
+            for data in [json.dumps(e) for e in events] + ["[DONE]"]:
+                self._chunk(f"data: {data}\n\n".encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            answer = {"choices": [{"message": {"content": "Hello!"}}]}
+            self._send(200, json.dumps(answer).encode("utf-8"))
+
+    def _send(self, status, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.status = 200
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client(server, clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30, probe_timeout=60, clock=clock)
+    return ChatCompletionClient(
+        f"http://127.0.0.1:{server.server_port}/", "key", "model", breaker=breaker
+    )
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def open_circuit(client, server):
+    server.status = 503
+    for _ in range(client.breaker.failure_threshold):
+        with pytest.raises(UpstreamError):
+            client.complete(MESSAGES)
+    server.status = 200
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_stream_yields_deltas(client):
+    assert "".join(client.stream(MESSAGES)) == "Hello!"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_stream_closed_early_releases_the_probe(client, server, clock):
+    open_circuit(client, server)
+    clock.now += 31
+
+    stream = client.stream(MESSAGES)
+    assert next(stream) == "Hel"  # this stream is the half-open probe
+    with pytest.raises(CircuitOpenError):
+        client.complete(MESSAGES)
+    stream.close()  # e.g. the SSE client disconnected
+
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.complete(MESSAGES) == "Hello!"
+
+
+def test_stream_failure_reopens_the_circuit(client, server, clock):
+    open_circuit(client, server)
+    clock.now += 31
+    server.status = 503
+
+    with pytest.raises(UpstreamError):
+        list(client.stream(MESSAGES))
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+# -------------------------------------------------
+# CircuitBreaker on its own (fake clock, no HTTP)
+# -------------------------------------------------
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, recovery_timeout=30, probe_timeout=60, clock=clock)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def test_closed_open_half_open_closed(breaker, clock):
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow_request()
+    assert breaker.stats()["timesOpened"] == 1
+    assert breaker.stats()["shortCircuited"] == 2
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    assert breaker.allow_request()
+
+
+def test_one_probe_at_a_time(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def ask():
+        barrier.wait()
+        results.append(breaker.allow_request())
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+
+    breaker.record_success()
+    assert breaker.allow_request()
+
+
+def test_abandoned_probe_times_out(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    assert breaker.allow_request()  # this probe never reports back
+
+    clock.now += 59
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()  # the next request becomes the probe
+    assert not breaker.allow_request()
+    assert breaker.stats()["probesTimedOut"] == 1
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
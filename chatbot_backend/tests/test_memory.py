@@ -0,0 +1,76 @@
+# chatbot_backend/tests/test_memory.py
+from memory import ConversationMemory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def questions(memory, key):
+    return [m["content"] for m in memory.history(key) if m["role"] == "user"]
+
+
+def test_window_keeps_the_newest_turns():
+    memory = ConversationMemory(max_turns=3, max_tokens=10_000)
+    for i in range(5):
+        memory.append(1, f"q{i}", f"a{i}")
+    assert questions(memory, 1) == ["q2", "q3", "q4"]
+    assert memory.history(1)[-2:] == [
+        {"role": "user", "content": "q4"},
+        {"role": "assistant", "content": "a4"},
+    ]
+
+
+def test_window_is_bounded_by_tokens():
+    # each turn estimates to 3 + 3 tokens (~4 characters per token)
+    memory = ConversationMemory(max_turns=10, max_tokens=13)
+    for i in range(4):
+        memory.append(1, f"question {i}", f"the answer{i}")
+    assert questions(memory, 1) == ["question 2", "question 3"]
+    assert memory.stats()["estimatedTokens"] == 12
+
+    # a single turn over budget is still kept, alone
+    memory.append(1, "x" * 200, "y")
+    assert questions(memory, 1) == ["x" * 200]
+
+
+def test_idle_conversations_expire():
+    clock = Clock()
+    memory = ConversationMemory(idle_ttl=60, clock=clock)
+    memory.append("old", "q", "a")
+    clock.now = 30
+    memory.append("recent", "q", "a")
+    clock.now = 70
+    assert memory.history("old") == []
+    assert questions(memory, "recent") == ["q"]  # reading refreshes it
+    clock.now = 125
+    assert "recent" in memory
+    assert memory.stats()["expirations"] == 1
+
+
+def test_least_recently_used_conversation_is_evicted():
+    memory = ConversationMemory(max_conversations=2)
+    memory.append(1, "q1", "a1")
+    memory.append(2, "q2", "a2")
+    memory.history(1)
+    memory.append(3, "q3", "a3")
+    assert (1 in memory, 2 in memory, 3 in memory) == (True, False, True)
+    assert memory.evictions == 1
+
+
+def test_seed_and_forget():
+    memory = ConversationMemory(max_turns=2)
+    memory.seed(1, [("q0", "a0"), ("q1", "a1"), ("q2", "a2")])
+    assert questions(memory, 1) == ["q1", "q2"]
+
+    memory.seed(1, [("stale", "stale")])  # already held: left alone
+    assert questions(memory, 1) == ["q1", "q2"]
+
+    memory.forget(1)
+    assert memory.history(1) == [] and len(memory) == 0
+    memory.append(None, "q", "a")
+    assert len(memory) == 0
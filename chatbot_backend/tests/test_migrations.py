@@ -0,0 +1,94 @@
+# chatbot_backend/tests/test_migrations.py
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, text
+
+import migrations
+from models import DailyHistory, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'users.db'}"
+    db.init_app(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def schema(inspector, tables):
+    return {
+        name: (
+            {c["name"] for c in inspector.get_columns(name)},
+            {i["name"] for i in inspector.get_indexes(name)},
+        )
+        for name in tables
+    }
+
+
+def test_fresh_database_gets_the_model_schema(app, tmp_path):
+    assert len(migrations.upgrade()) == len(migrations.MIGRATIONS)
+    assert migrations.upgrade() == []
+    migrated = schema(inspect(db.engine), db.metadata.tables)
+
+    # the same models, created directly
+    reference = Flask(__name__)
+    reference.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'reference.db'}"
+    db.init_app(reference)
+    with reference.app_context():
+        db.create_all()
+        expected = schema(inspect(db.engine), db.metadata.tables)
+        db.engine.dispose()
+
+    assert migrated == expected
+
+
+def test_old_database_is_backfilled(app):
+    migrations.create_tables()
+    conn = db.session.connection()
+    conn.execute(
+        text(
+            "INSERT INTO users (id, full_name, email, password_hash, role) "
+            "VALUES (1, 'A', 'a@x', 'h', 'STUDENT')"
+        )
+    )
+    conn.execute(text("INSERT INTO ai_conversations (id, user_id) VALUES (1, 1)"))
+    for i, (sender, stamp) in enumerate(
+        [("user", "2025-01-01 09:00:00"), ("ai", "2025-01-01 09:00:01"), ("user", "2025-01-02 10:00:00")],
+        start=1,
+    ):
+        conn.execute(
+            text(
+                "INSERT INTO ai_messages (id, conversation_id, sender, text, created_at) "
+                "VALUES (:id, 1, :sender, :text, :stamp)"
+            ),
+            {"id": i, "sender": sender, "text": f"message {i}", "stamp": stamp},
+        )
+    db.session.commit()
+
+    migrations.upgrade()
+
+    conn = db.session.connection()
+    assert conn.execute(
+        text("SELECT message_count, last_message_id, last_snippet FROM ai_conversations")
+    ).one() == (3, 3, "message 3")
+    days = conn.execute(
+        text("SELECT day, message_count, first_at, last_at, snippet FROM daily_history ORDER BY day")
+    ).fetchall()
+    assert [(d, n, s) for d, n, _, _, s in days] == [
+        ("2025-01-01", 2, "message 1"),
+        ("2025-01-02", 1, "message 3"),
+    ]
+
+    first = DailyHistory.query.filter_by(user_id=1, day=date(2025, 1, 1)).one()
+    assert (first.first_at, first.last_at) == (datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 9, 0, 1))
+
+
+def test_hot_queries_use_indexes(app):
+    migrations.upgrade()
+    for name, plan, problems in migrations.explain_hot_queries():
+        assert not problems, f"{name}: {plan}"
@@ -0,0 +1,185 @@
+# chatbot_backend/tests/test_models.py
+"""
+The denormalized history columns against a full rebuild.
+
+Messages are added and deleted at random the way app.py does it: inserts
+in created_at order (the column default) tracked by the after_insert
+hooks, deletes followed by sync_conversation_stats / rebuild_daily_history.
+After every step the stored values must equal ones computed from scratch.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+import migrations
+from models import (
+    SNIPPET_CHARS,
+    AiConversation,
+    AiMessage,
+    DailyHistory,
+    User,
+    db,
+    rebuild_daily_history,
+    sync_conversation_stats,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'users.db'}"
+    db.init_app(app)
+    with app.app_context():
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def churn(rng, steps, check):
+    """Random inserts and deletes over two users, calling check() after each."""
+    users = [
+        User(full_name=f"U{i}", email=f"u{i}@x", password_hash="h", role="STUDENT")
+        for i in range(2)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    now = datetime(2025, 3, 1, 22, 0)
+
+    for step in range(steps):
+        conversations = AiConversation.query.all()
+        messages = AiMessage.query.all()
+        if messages and rng.random() < 0.3:
+            delete_messages(rng.sample(messages, min(len(messages), rng.randint(1, 2))))
+        else:
+            if not conversations or rng.random() < 0.15:
+                conv = AiConversation(user_id=rng.choice(users).id)
+                db.session.add(conv)
+                db.session.flush()
+            else:
+                conv = rng.choice(conversations)
+            now += timedelta(minutes=rng.randint(1, 120))  # crosses midnights
+            db.session.add(
+                AiMessage(
+                    conversation_id=conv.id,
+                    sender=rng.choice(["user", "ai"]),
+                    text=f"message {step} " + "x" * rng.randint(0, SNIPPET_CHARS),
+                    created_at=now,
+                )
+            )
+            db.session.commit()
+        check()
+    return users
+
+
+def delete_messages(messages):
+    """What the delete endpoints do after removing messages."""
+    by_user = {}
+    conv_ids = set()
+    for m in messages:
+        by_user.setdefault(m.conversation.user_id, set()).add(m.created_at.date())
+        conv_ids.add(m.conversation_id)
+        db.session.delete(m)
+    db.session.flush()
+    sync_conversation_stats(AiConversation.id.in_(conv_ids))
+    for user_id, days in by_user.items():
+        rebuild_daily_history(user_id, days)
+    db.session.commit()
+
+
+def stored_conversations():
+    return sorted(
+        db.session.query(
+            AiConversation.id,
+            AiConversation.message_count,
+            AiConversation.last_message_id,
+            AiConversation.last_snippet,
+        ).all()
+    )
+
+
+def rebuilt_conversations():
+    rows = []
+    for (conv_id,) in db.session.query(AiConversation.id).order_by(AiConversation.id):
+        messages = AiMessage.query.filter_by(conversation_id=conv_id).order_by(AiMessage.id).all()
+        last = messages[-1] if messages else None
+        rows.append(
+            (
+                conv_id,
+                len(messages),
+                last.id if last else None,
+                last.text[:SNIPPET_CHARS] if last else None,
+            )
+        )
+    return rows
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_conversation_stats_match_a_rebuild(app, seed):
+    def check():
+        assert stored_conversations() == rebuilt_conversations()
+
+    churn(random.Random(seed), 80, check)
+
+    # and sync_conversation_stats over every conversation changes nothing
+    before = stored_conversations()
+    AiConversation.query.update(
+        {"message_count": None, "last_message_id": None, "last_snippet": None},
+        synchronize_session=False,
+    )
+    sync_conversation_stats()
+    db.session.commit()
+    assert stored_conversations() == before
+
+
+def stored_days():
+    return sorted(
+        db.session.query(
+            DailyHistory.user_id,
+            DailyHistory.day,
+            DailyHistory.message_count,
+            DailyHistory.first_at,
+            DailyHistory.last_at,
+            DailyHistory.snippet,
+        ).all()
+    )
+
+
+def rebuilt_days():
+    days = {}
+    messages = (
+        db.session.query(AiConversation.user_id, AiMessage)
+        .join(AiMessage, AiMessage.conversation_id == AiConversation.id)
+        .order_by(AiMessage.created_at, AiMessage.id)
+    )
+    for user_id, m in messages:
+        key = (user_id, m.created_at.date())
+        count, first_at, _, snippet = days.get(key, (0, m.created_at, None, None))
+        if snippet is None and m.sender == "user":
+            snippet = m.text[:SNIPPET_CHARS]
+        days[key] = (count + 1, first_at, m.created_at, snippet)
+    return sorted(key + value for key, value in days.items())
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_daily_history_matches_a_rebuild(app, seed):
+    def check():
+        assert stored_days() == rebuilt_days()
+
+    users = churn(random.Random(seed), 80, check)
+
+    # and rebuild_daily_history from an empty table gives the same rows
+    before = stored_days()
+    DailyHistory.query.delete()
+    for user in users:
+        days = {
+            created_at.date()
+            for (created_at,) in db.session.query(AiMessage.created_at)
+            .join(AiConversation, AiConversation.id == AiMessage.conversation_id)
+            .filter(AiConversation.user_id == user.id)
+        }
+        rebuild_daily_history(user.id, days)
+    db.session.commit()
+    assert stored_days() == before
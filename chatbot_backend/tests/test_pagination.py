@@ -0,0 +1,66 @@
+# chatbot_backend/tests/test_pagination.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from pagination import PageRequest, encode_cursor, keyset_page
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        start = datetime(2025, 1, 1)
+        # two rows per timestamp, so the id breaks ties
+        session.add_all(
+            Row(id=i, created_at=start + timedelta(minutes=i // 2)) for i in range(1, 8)
+        )
+        session.commit()
+        yield session
+
+
+def page(session, args, newest_first=False):
+    request = PageRequest.from_args(args, default=3, maximum=5)
+    rows, info = keyset_page(session.query(Row), Row.created_at, Row.id, request, newest_first)
+    return [r.id for r in rows], info
+
+
+def test_requests_without_a_limit_get_the_default_page(session):
+    ids, info = page(session, {})
+    assert ids == [5, 6, 7]
+    assert info["limit"] == 3 and info["hasMore"] is True
+
+    ids, _ = page(session, {}, newest_first=True)
+    assert ids == [7, 6, 5]
+
+
+def test_pages_cover_the_list_once(session):
+    ids, info = page(session, {"limit": "3"})
+    seen = [ids]
+    while info["hasMore"]:
+        ids, info = page(session, {"limit": "3", "before": info["before"]})
+        seen.insert(0, ids)
+    assert seen == [[1], [2, 3, 4], [5, 6, 7]]
+
+    # ?after= without ?limit= gets the default page size
+    ids, info = page(session, {"after": encode_cursor(datetime(2025, 1, 1), 1)})
+    assert ids == [2, 3, 4] and info["limit"] == 3 and info["hasMore"] is True
+
+
+def test_limit_is_clamped_and_validated(session):
+    assert page(session, {"limit": "100"})[1]["limit"] == 5
+    with pytest.raises(ValueError):
+        PageRequest.from_args({"limit": "x"})
+    with pytest.raises(ValueError):
+        PageRequest.from_args({"before": "garbage"})
@@ -0,0 +1,69 @@
+# chatbot_backend/tests/test_retrieval.py
+import numpy as np
+
+import index_store
+from retrieval import KnowledgeIndex, VectorIndex, mmr_rerank, normalize_rows
+
+NEAR_DUPLICATE = 0.9  # cosine above which two chunks say the same thing
+
+
+def near_duplicate_pairs(vectors, ids):
+    sims = vectors[ids] @ vectors[ids].T
+    upper = np.triu_indices(len(ids), k=1)
+    return int((sims[upper] > NEAR_DUPLICATE).sum())
+
+
+def test_mmr_drops_near_duplicates():
+    # 40 passages, each stored as 3 near-identical copies; every query is
+    # about two passages, so a plain top-2 is two copies of the first
+    rng = np.random.default_rng(0)
+    topics = normalize_rows(rng.standard_normal((40, 384)))
+    copies = np.repeat(topics, 3, axis=0) + 0.25 * rng.standard_normal((120, 384)) / np.sqrt(384)
+    vectors = normalize_rows(copies)
+    queries = normalize_rows(topics[0:20:2] + 0.9 * topics[1:20:2])
+    hits = VectorIndex(vectors).search(queries, top_k=12)
+
+    plain = [[i for i, _ in h[:2]] for h in hits]
+    reranked = [[i for i, _ in mmr_rerank(h, vectors, top_k=2, lambda_=0.7)] for h in hits]
+
+    assert sum(near_duplicate_pairs(vectors, ids) for ids in plain) > 0
+    assert sum(near_duplicate_pairs(vectors, ids) for ids in reranked) == 0
+    for q, ids in enumerate(reranked):
+        # both passages the query is about are covered
+        assert {i // 3 for i in ids} == {2 * q, 2 * q + 1}
+
+
+def test_mmr_keeps_the_best_hit_and_lambda_one_keeps_the_order():
+    vectors = normalize_rows(np.array([[1, 0, 0], [1, 0.01, 0], [0, 1, 0]], dtype=np.float32))
+    candidates = [(0, 0.9), (1, 0.89), (2, 0.5)]
+
+    assert mmr_rerank(candidates, vectors, top_k=2, lambda_=0.5) == [(0, 0.9), (2, 0.5)]
+    assert mmr_rerank(candidates, vectors, top_k=2, lambda_=1.0) == candidates[:2]
+
+
+def test_merged_index_searches_the_mapped_shards_in_place(tmp_path):
+    rng = np.random.default_rng(1)
+    shards, stacked = {}, []
+    for name, n in [("a", 5), ("b", 1), ("c", 7)]:
+        vectors = normalize_rows(rng.standard_normal((n, 16)))
+        chunks = [{"text": f"{name} chunk {i}", "source": name} for i in range(n)]
+        index_store.save_index(str(tmp_path / name), "key", vectors, chunks)
+        stored = index_store.load_index(str(tmp_path / name), "key")
+        shards[name] = KnowledgeIndex(stored["chunks"], stored["embeddings"], name, normalized=True)
+        stacked.append(vectors)
+    stacked = np.vstack(stacked)
+
+    kb = KnowledgeIndex.merge(shards)
+    # no copy: every part is the shard's memory-mapped matrix
+    assert [type(m.base) for m in kb.vectors.parts] == [np.memmap] * 3
+    assert all(np.shares_memory(m, shards[n].embeddings) for m, n in zip(kb.vectors.parts, "abc"))
+
+    queries = rng.standard_normal((4, 16))
+    merged_hits = kb.vectors.search(queries, top_k=13)
+    stacked_hits = VectorIndex(stacked).search(queries, top_k=13)
+    for merged, expected in zip(merged_hits, stacked_hits):
+        assert [i for i, _ in merged] == [i for i, _ in expected]
+        assert np.allclose([s for _, s in merged], [s for _, s in expected])
+    assert np.array_equal(kb.vectors[[12, 0, 5, 6]], stacked[[12, 0, 5, 6]])
+    assert np.array_equal(kb.vectors[5], stacked[5])
+    assert kb.subset(["a", "c"]).chunk_texts == kb.chunk_texts[:5] + kb.chunk_texts[6:]
@@ -0,0 +1,185 @@
+# chatbot_backend/tests/test_summaries.py
+"""
+Rolling summaries: the background queue, and summarize_conversation's
+compare-and-set write racing a new turn, a deleted pair or another pass.
+
+app.py is imported against a throwaway SQLite file with the warmup off;
+the Assistant is a stand-in whose summarize() is where the races happen.
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from memory import ConversationMemory
+from models import AiConversation, AiMessage, User, db
+from summaries import BackgroundSummarizer
+
+
+def test_queued_conversation_is_scheduled_once():
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def job(cid):
+        runs.append(cid)
+        if cid == "busy":
+            started.set()
+            release.wait(5)
+        if cid == "broken":
+            raise RuntimeError("boom")
+
+    summarizer = BackgroundSummarizer(job)
+    summarizer.schedule("busy")
+    started.wait(5)
+    for cid in ["a", "a", "broken", "a"]:
+        summarizer.schedule(cid)
+    release.set()
+    summarizer._executor.shutdown(wait=True)
+
+    assert runs == ["busy", "a", "broken"]
+    assert summarizer.stats() == {
+        "queued": 0,
+        "scheduled": 3,
+        "merged": 2,
+        "completed": 2,
+        "failed": 1,
+    }
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    patch = pytest.MonkeyPatch()
+    tmp = tmp_path_factory.mktemp("summaries")
+    patch.setenv("DATABASE_URL", f"sqlite:///{tmp / 'users.db'}")
+    patch.setenv("CHATBOT_WARMUP", "0")
+    patch.chdir(tmp)  # api_errors.log
+    import app as server
+
+    yield server
+    with server.app.app_context():
+        db.engine.dispose()
+    patch.undo()
+
+
+@pytest.fixture
+def chat(server, monkeypatch):
+    """A conversation of four exchanges; the newest one stays out of the summary."""
+    monkeypatch.setitem(server.app.config, "SUMMARY_MIN_MESSAGES", 2)
+    scheduled = []
+    monkeypatch.setattr(server.summarizer, "schedule", scheduled.append)
+
+    calls = []
+    races = []
+
+    def summarize(previous, lines, max_words=120):
+        calls.append((previous, list(lines)))
+        if races:
+            races.pop(0)()
+        return f"summary of {len(lines)} after {previous}"
+
+    bot = SimpleNamespace(memory=ConversationMemory(max_turns=1), summarize=summarize)
+    monkeypatch.setattr(server, "chatbot", bot)
+
+    with server.app.app_context():
+        user = User(
+            full_name="S", email=f"{uuid.uuid4().hex}@x", password_hash="h", role="STUDENT"
+        )
+        db.session.add(user)
+        db.session.commit()
+        conv = AiConversation(user_id=user.id, title="q0")
+        db.session.add(conv)
+        db.session.commit()
+        chat = SimpleNamespace(
+            user_id=user.id,
+            conv_id=conv.id,
+            token=create_access_token(identity=str(user.id), additional_claims={"role": "STUDENT"}),
+            calls=calls,
+            races=races,
+            scheduled=scheduled,
+            start=datetime(2025, 5, 1, 9),
+            sent=0,
+        )
+    for _ in range(4):
+        add_turn(server, chat)
+    return chat
+
+
+def add_turn(server, chat):
+    """Save one exchange the way a chat request does, in its own app context."""
+    with server.app.app_context():
+        for sender in ("user", "ai"):
+            db.session.add(
+                AiMessage(
+                    conversation_id=chat.conv_id,
+                    sender=sender,
+                    text=f"{'q' if sender == 'user' else 'a'}{chat.sent // 2}",
+                    created_at=chat.start + timedelta(minutes=chat.sent),
+                )
+            )
+            chat.sent += 1
+        db.session.commit()
+
+
+def stored(server, chat):
+    with server.app.app_context():
+        conv = db.session.get(AiConversation, chat.conv_id)
+        upto = db.session.get(AiMessage, conv.summary_upto_id) if conv.summary_upto_id else None
+        return conv.summary, upto.text if upto else None
+
+
+def test_summary_folds_all_but_the_newest_turn(server, chat):
+    server.summarize_conversation(chat.conv_id)
+    lines = ["User: q0", "Assistant: a0", "User: q1", "Assistant: a1", "User: q2", "Assistant: a2"]
+    assert chat.calls == [(None, lines)]
+    assert stored(server, chat) == ("summary of 6 after None", "a2")
+
+
+def test_delete_during_summary_discards_it_and_rebuilds(server, chat):
+    with server.app.app_context():
+        q0 = AiMessage.query.filter_by(conversation_id=chat.conv_id, text="q0").one().id
+
+    def delete_first_pair():
+        with server.app.test_client() as client:
+            response = client.delete(
+                f"/api/ai/pairs/{q0}", headers={"Authorization": f"Bearer {chat.token}"}
+            )
+            assert response.status_code == 200
+
+    chat.races.append(delete_first_pair)
+    server.summarize_conversation(chat.conv_id)
+
+    # the summary still mentions q0/a0: not saved, and the delete asked for a rebuild
+    assert stored(server, chat) == (None, None)
+    assert chat.scheduled == [chat.conv_id]
+
+    server.summarize_conversation(chat.conv_id)
+    assert chat.calls[-1] == (None, ["User: q1", "Assistant: a1", "User: q2", "Assistant: a2"])
+    assert stored(server, chat) == ("summary of 4 after None", "a2")
+
+
+def test_new_turn_during_summary_is_left_for_the_next_pass(server, chat):
+    chat.races.append(lambda: add_turn(server, chat))
+    server.summarize_conversation(chat.conv_id)
+    assert stored(server, chat) == ("summary of 6 after None", "a2")
+
+    # the turn that arrived meanwhile is folded by the next pass, on top
+    server.summarize_conversation(chat.conv_id)
+    assert chat.calls[-1] == ("summary of 6 after None", ["User: q3", "Assistant: a3"])
+    assert stored(server, chat) == ("summary of 2 after summary of 6 after None", "a3")
+
+
+def test_pass_that_lost_the_race_is_discarded(server, chat):
+    def other_pass_wins():
+        with server.app.app_context():
+            a1 = AiMessage.query.filter_by(conversation_id=chat.conv_id, text="a1").one()
+            AiConversation.query.filter_by(id=chat.conv_id).update(
+                {"summary": "the other pass", "summary_upto_id": a1.id}
+            )
+            db.session.commit()
+
+    chat.races.append(other_pass_wins)
+    server.summarize_conversation(chat.conv_id)
+    assert stored(server, chat) == ("the other pass", "a1")
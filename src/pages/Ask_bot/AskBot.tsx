@@ -6,6 +6,41 @@ import { io, Socket } from "socket.io-client";
 import ChatParticles from "../../components/ChatParticles";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:5001";
+// rows per request to the paged history endpoints (capped by the backend)
+const HISTORY_PAGE_SIZE = 200;
+
+/**
+ * GET a paged list endpoint (conversation messages, pairs of a date, thread
+ * messages) and follow `page.before` until the oldest page. Pages list their
+ * rows oldest first, so older pages go in front. Returns the first response
+ * with `json[key]` holding every row, or the failing response as is.
+ */
+const fetchAllPages = async (
+  url: string,
+  key: string,
+  token: string
+): Promise<{ ok: boolean; json: any }> => {
+  let rows: any[] = [];
+  let first: any = null;
+  let before: string | null = null;
+  do {
+    const query: string = before
+      ? `?limit=${HISTORY_PAGE_SIZE}&before=${encodeURIComponent(before)}`
+      : `?limit=${HISTORY_PAGE_SIZE}`;
+    const res = await fetch(`${url}${query}`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    });
+    const json = await res.json();
+    if (!res.ok) return { ok: false, json };
+
+    first = first || json;
+    rows = [...(json[key] || []), ...rows];
+    before = json.page?.hasMore ? json.page.before : null;
+  } while (before);
+  return { ok: true, json: { ...first, [key]: rows } };
+};
 
 
 type SimpleMessage = {
@@ -217,13 +252,12 @@ const AskBot: React.FC = () => {
   const fetchAiConversation = async (convId: number) => {
     if (!token) return;
     try {
-      const res = await fetch(`${API_BASE}/api/ai/conversations/${convId}`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
-      const json = await res.json();
-      if (!res.ok) {
+      const { ok, json } = await fetchAllPages(
+        `${API_BASE}/api/ai/conversations/${convId}`,
+        "messages",
+        token
+      );
+      if (!ok) {
         console.error("Failed to load AI conversation:", json.error || json);
         return;
       }
@@ -374,13 +408,12 @@ const AskBot: React.FC = () => {
     setAiHistoryInfo(null);
 
     try {
-      const res = await fetch(`${API_BASE}/api/ai/history/dates/${date}`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
-      const json = await res.json();
-      if (!res.ok) {
+      const { ok, json } = await fetchAllPages(
+        `${API_BASE}/api/ai/history/dates/${date}`,
+        "pairs",
+        token
+      );
+      if (!ok) {
         setAiHistoryInfo(json.error || "Failed to load chats for this date.");
         setAiPairs([]);
         return;
@@ -509,16 +542,12 @@ const AskBot: React.FC = () => {
     setSupportInfo(null);
 
     try {
-      const res = await fetch(
+      const { ok, json } = await fetchAllPages(
         `${API_BASE}/api/support/threads/${threadId}/messages`,
-        {
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        }
+        "messages",
+        token
       );
-      const json = await res.json();
-      if (!res.ok) {
+      if (!ok) {
         setSupportInfo(json.error || "Failed to load messages.");
         setSupportMessages([]);
         return;
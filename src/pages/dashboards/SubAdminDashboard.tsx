@@ -97,6 +97,8 @@ const mapApiUserToRow = (user: ApiUser): UserRow => {
 };
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:5001";
+// rows per /api/admin/users request (the backend caps it at PAGE_SIZE_MAX)
+const USERS_PAGE_SIZE = 200;
 
 
 const SubAdminDashboard: FC = () => {
@@ -200,21 +202,31 @@ const SubAdminDashboard: FC = () => {
         };
         if (token) headers["Authorization"] = `Bearer ${token}`;
 
-        const res = await fetch(`${API_BASE}/api/admin/users`, {
-          method: "GET",
-          headers,
-        });
+        // the list comes in pages, newest first; follow page.before
+        const apiUsers: ApiUser[] = [];
+        let before: string | null = null;
+        do {
+          const query: string = before
+            ? `?limit=${USERS_PAGE_SIZE}&before=${encodeURIComponent(before)}`
+            : `?limit=${USERS_PAGE_SIZE}`;
+          const res = await fetch(`${API_BASE}/api/admin/users${query}`, {
+            method: "GET",
+            headers,
+          });
+
+          if (!res.ok) {
+            console.error(
+              "Failed to load users for Sub-Admin. HTTP:",
+              res.status
+            );
+            return;
+          }
+
+          const body = await res.json();
+          apiUsers.push(...(body.users || []));
+          before = body.page?.hasMore ? body.page.before : null;
+        } while (before);
 
-        if (!res.ok) {
-          console.error(
-            "Failed to load users for Sub-Admin. HTTP:",
-            res.status
-          );
-          return;
-        }
-
-        const body = await res.json();
-        const apiUsers: ApiUser[] = body.users || [];
         setUsers(apiUsers.map(mapApiUserToRow));
       } catch (err) {
         console.error("Error fetching users for Sub-Admin:", err);
@@ -100,6 +100,8 @@ const mapApiUserToRow = (user: ApiUser): UserRow => {
 };
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:5001";
+// rows per /api/admin/users request (the backend caps it at PAGE_SIZE_MAX)
+const USERS_PAGE_SIZE = 200;
 
 
 const AdminDashboard: FC = () => {
@@ -201,27 +203,37 @@ firstName,
           headers["Authorization"] = `Bearer ${token}`;
         }
 
-        const response = await fetch(`${API_BASE}/api/admin/users`, {
-          method: "GET",
-          headers,
-        });
-
-        if (!response.ok) {
-          console.error(
-            "Failed to load users for UserManagementCard. HTTP:",
-            response.status
-          );
-          try {
-            const body = await response.json();
-            console.error("Response body:", body);
-          } catch {
-            /* ignore */
+        // the list comes in pages, newest first; follow page.before
+        const apiUsers: ApiUser[] = [];
+        let before: string | null = null;
+        do {
+          const query: string = before
+            ? `?limit=${USERS_PAGE_SIZE}&before=${encodeURIComponent(before)}`
+            : `?limit=${USERS_PAGE_SIZE}`;
+          const response = await fetch(`${API_BASE}/api/admin/users${query}`, {
+            method: "GET",
+            headers,
+          });
+
+          if (!response.ok) {
+            console.error(
+              "Failed to load users for UserManagementCard. HTTP:",
+              response.status
+            );
+            try {
+              const body = await response.json();
+              console.error("Response body:", body);
+            } catch {
+              /* ignore */
+            }
+            return;
           }
-          return;
-        }
 
-        const body = await response.json();
-        const apiUsers: ApiUser[] = body.users || [];
+          const body = await response.json();
+          apiUsers.push(...(body.users || []));
+          before = body.page?.hasMore ? body.page.before : null;
+        } while (before);
+
         const rows = apiUsers.map(mapApiUserToRow);
         setUsers(rows);
       } catch (err) {